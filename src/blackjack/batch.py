@@ -0,0 +1,237 @@
+"""
+Vectorized engine to play many independent rounds of blackjack at once
+
+The object based path (`Game.play` -> `RoundKernel.deal` / `play` / `settle`) plays a single round with `Card`,
+`Hand` and `Player` objects. This module plays N rounds at the same time on integer arrays:
+
+- every round gets its own freshly shuffled shoe stored as an int8 array of rank codes
+- player and dealer totals (and the number of aces still counted as 11) are vectors
+- fixed policies (the dealer stand on 17 rule and the default `Player.policy`) are applied as masks
+
+The dealing order mirrors `RoundKernel.deal`/`play` (each seat then the dealer, twice, then the seats hit in order
+and the dealer finishes) so the outcome distribution matches the object based path.
+"""
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from .tools import LABELS, VALUES
+
+# rank codes index LABELS (0 -> '2', ..., 12 -> 'Ace')
+RANKS = len(LABELS)
+RANK_VALUES = np.array(VALUES[:-1] + [11], dtype=np.int8)
+ACE = RANKS - 1
+
+_policy = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+def player_policy(totals, upcards) -> np.ndarray:
+    """
+    Vectorized version of the default `Player.policy` --- hit while at most the dealers card plus 8 and below 18
+
+    Parameters
+    ----------
+    totals : np.ndarray
+        the players totals
+    upcards : np.ndarray
+        value of the dealers face up card
+
+    Returns
+    -------
+    hit : np.ndarray[bool]
+        mask of the rounds where the player hits
+    """
+    return (totals <= upcards + 8) & (totals < 18)
+
+
+def dealer_policy(totals, upcards=None) -> np.ndarray:
+    """ Vectorized version of `Dealer.policy` --- hit below 17 (stand on all 17s) """
+    return totals < 17
+
+
+def calc_winner(dealer_scores, player_scores) -> np.ndarray:
+    """ Vectorized version of `round.calc_winner` --- 1 is a win, 0 is a push and -1 is a loss for the player """
+    results = np.sign(player_scores.astype(np.int16) - dealer_scores).astype(np.int8)
+    results[np.broadcast_to(dealer_scores > 21, results.shape)] = 1
+    results[player_scores > 21] = -1
+    return results
+
+
+def shuffled_shoes(n, repeats=1, rng=None, cards=False) -> np.ndarray:
+    """
+    Function to create many shuffled shoes in one vectorized call
+
+    Parameters
+    ----------
+    n : int
+        number of shoes
+    repeats : int
+        the number of decks in each shoe
+    rng : np.random.Generator, optional
+        random generator to shuffle with
+    cards : bool
+        whether to return the card codes used by `tools.Deck` (uint8) instead of rank codes
+
+    Returns
+    -------
+    shoes : np.ndarray[int8]
+        array of shape (n, 52*repeats) with the rank codes (or card codes) of each shoe in dealing order
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    if cards:
+        deck = np.tile(np.arange(RANKS * 4, dtype=np.uint8), repeats)
+    else:
+        deck = np.repeat(np.arange(RANKS, dtype=np.int8), 4 * repeats)
+    shoes = np.tile(deck, (n, 1))
+    rng.permuted(shoes, axis=1, out=shoes)
+    return shoes
+
+
+class ShoeBatch(object):
+    """
+    Class to hold one shoe per round and deal from each shoe with its own cursor
+
+    Mirrors `Dealer.deal_card`: when a shoe runs out, a new shuffled shoe is appended behind it
+
+    Attributes
+    ----------
+    shoes : np.ndarray[int8]
+        rank codes for each shoe, shape (n, cards)
+    cursor : np.ndarray[int64]
+        the position of the next card to deal in each shoe
+    """
+    def __init__(self, n:int, repeats:int = 1, rng=None):
+        self.repeats = repeats
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.shoes = shuffled_shoes(n, repeats, self.rng)
+        self.cursor = np.zeros(n, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.shoes)
+
+    def deal(self, rows) -> np.ndarray:
+        """
+        Function to deal one card to each of the given rows
+
+        Parameters
+        ----------
+        rows : np.ndarray[int]
+            indices of the rounds being dealt to
+
+        Returns
+        -------
+        values : np.ndarray[int8]
+            blackjack values of the dealt cards (aces are 11)
+        """
+        positions = self.cursor[rows]
+        if len(positions) and positions.max() >= self.shoes.shape[1]:
+            # ran out of cards, grab a new shoe
+            more = shuffled_shoes(len(self), self.repeats, self.rng)
+            self.shoes = np.concatenate((self.shoes, more), axis=1)
+        self.cursor[rows] = positions + 1
+        return RANK_VALUES[self.shoes[rows, positions]]
+
+
+def add_cards(totals, soft, rows, values) -> None:
+    """
+    Function to add cards to hands stored as vectors (in place), mirroring the soft ace handling in `Hand.total`
+
+    Parameters
+    ----------
+    totals : np.ndarray
+        hand totals
+    soft : np.ndarray
+        number of aces in each hand that are still counted as 11
+    rows : np.ndarray[int]
+        indices of the hands receiving a card
+    values : np.ndarray
+        the values of the cards
+    """
+    t = totals[rows] + values
+    s = soft[rows] + (values == 11)
+    over = (t > 21) & (s > 0)
+    while over.any():
+        # count an ace as 1 instead of 11
+        t -= 10 * over
+        s -= over
+        over = (t > 21) & (s > 0)
+    totals[rows] = t
+    soft[rows] = s
+
+
+def _play_hands(shoe, totals, soft, rows, policy, upcards) -> None:
+    """ Function to keep hitting the hands in rows until the policy stays for all of them """
+    active = rows[policy(totals[rows], upcards[rows])]
+    while len(active):
+        add_cards(totals, soft, active, shoe.deal(active))
+        active = active[policy(totals[active], upcards[active])]
+
+
+def _play_chunk(n, nplayers, repeats, player_policy, dealer_policy, rng) -> Tuple[np.ndarray, np.ndarray]:
+    """ Function to play n rounds and return the totals (dealer first) and the number of usable aces """
+    shoe = ShoeBatch(n, repeats, rng)
+    rows = np.arange(n)
+    totals = np.zeros((nplayers + 1, n), dtype=np.int8)
+    soft = np.zeros((nplayers + 1, n), dtype=np.int8)
+
+    # deal one set of cards to everyone (dealer last), twice
+    upcards = None
+    for _ in range(2):
+        for seat in list(range(1, nplayers + 1)) + [0]:
+            values = shoe.deal(rows)
+            add_cards(totals[seat], soft[seat], rows, values)
+        upcards = values  # the dealers second card is face up
+
+    for seat in range(1, nplayers + 1):
+        _play_hands(shoe, totals[seat], soft[seat], rows, player_policy, upcards)
+
+    # dealer finishes the round
+    _play_hands(shoe, totals[0], soft[0], rows, dealer_policy, upcards)
+    return totals, soft
+
+
+def play_rounds(nrounds:int, nplayers:int = 1, repeats:int = 1, player_policy:_policy = player_policy,
+                dealer_policy:_policy = dealer_policy, seed:Optional[int] = None,
+                chunk_size:int = 100_000) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Function to play many independent rounds of blackjack at once
+
+    Every round is played with a freshly shuffled shoe, like `Game.play` resetting the deck each round.
+
+    Parameters
+    ----------
+    nrounds : int
+        the number of rounds to play
+    nplayers : int
+        the number of players (not including the dealer) in each round
+    repeats : int
+        the number of decks in the shoe
+    player_policy : Callable[[np.ndarray, np.ndarray], np.ndarray]
+        maps the players totals and the dealers face up card to a mask of which players hit
+    dealer_policy : Callable[[np.ndarray, np.ndarray], np.ndarray]
+        maps the dealers totals to a mask of which dealers hit
+    seed : int or np.random.Generator, optional
+        seed for the random generator
+    chunk_size : int
+        the maximum number of rounds (shoes) held in memory at once
+
+    Returns
+    -------
+    scores : np.ndarray[int8]
+        final totals with shape (nrounds, nplayers+1) --- the dealer comes first
+    busted : np.ndarray[bool]
+        whether the hand busted with shape (nrounds, nplayers+1) --- the dealer comes first
+    results : np.ndarray[int8]
+        `calc_winner` for each player with shape (nrounds, nplayers) --- 1 win, 0 push, -1 loss
+    """
+    rng = np.random.default_rng(seed)
+    scores = np.empty((nrounds, nplayers + 1), dtype=np.int8)
+
+    for start in range(0, nrounds, chunk_size):
+        stop = min(start + chunk_size, nrounds)
+        totals, _ = _play_chunk(stop - start, nplayers, repeats, player_policy, dealer_policy, rng)
+        scores[start:stop] = totals.T
+
+    busted = scores > 21
+    results = calc_winner(scores[:, :1], scores[:, 1:])
+    return scores, busted, results
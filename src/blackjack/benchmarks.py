@@ -0,0 +1,235 @@
+"""
+Benchmark suite for the game engine and the learners
+
+Micro benchmarks time single operations (creating a deck, dealing a card, reading a hand's total, an agent's policy
+and update, policy improvement). Macro benchmarks measure rounds per second for `Game` and episodes per second for
+`GameWAgents` for a grid of deck and seat counts, plus the peak memory of each scenario.
+
+Results are written as json and can be compared against a stored baseline:
+
+    python -m blackjack.benchmarks --out bench.json --baseline baseline.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Dict, List, Sequence
+
+from .environment import Game, GameWAgents
+from .events import NULL_SINK
+from .players import Agent
+from .tools import Card, Deck, Hand
+
+
+def _rate(func, number:int) -> float:
+    """ Function to get the number of calls per second """
+    return number / timeit.timeit(func, number=number)
+
+
+def micro_benchmarks(number:int = 10_000) -> Dict[str, float]:
+    """
+    Function to time single operations of the engine and the learner
+
+    Parameters
+    ----------
+    number : int
+        number of times to run each operation
+
+    Returns
+    -------
+    results : Dict[str, float]
+        operations per second
+    """
+    results = {}
+    results['deck_creation'] = _rate(lambda: Deck(repeats=6), max(number // 100, 1))
+
+    # not shuffled so putting the cards back (reshuffle) costs next to nothing
+    deck = Deck(shuffle=False, repeats=8)
+    def deal():
+        for _ in range(52 * 8):
+            deck.deal_card()
+        deck.reshuffle()
+    results['deal_card'] = _rate(deal, max(number // 400, 1)) * 52 * 8
+
+    hand = Hand(Card('Ace', 'Spades', 11), Card('6', 'Hearts', 6), Card('9', 'Clubs', 9))
+    results['hand_total'] = _rate(lambda: hand.total, number)
+
+    # imported here so the command line stays fast to start (the methods need numpy)
+    from .methods import MCExploringStarts
+
+    agent = Agent(MCExploringStarts)
+    agent.add_card(Card('10', 'Spades', 10))
+    agent.add_card(Card('4', 'Hearts', 4))
+    def policy():
+        agent.policy(10)
+        agent.trajectory.reset()
+    results['agent_policy'] = _rate(policy, number)
+
+    def update():
+        agent.trajectory.append(3, 1, 1)
+        agent.trajectory.append(8, 1, 1)
+        agent.trajectory.append(13, 1, 0)
+        agent.update(1)
+    results['agent_update'] = _rate(update, number)
+
+    method, table = agent.method, agent.table
+    results['policy_improvement'] = _rate(
+        lambda: method.policy_improvement((14, 10), agent.actions, table.policy_func, table.q_func), number)
+    return results
+
+
+def _play(game) -> None:
+    # seed so every run plays the same hands
+    random.seed(0)
+    game.play()
+
+
+def macro_benchmarks(rounds:int = 2000, decks:Sequence[int] = (1, 6, 8),
+                     seats:Sequence[int] = tuple(range(1, 8))) -> Dict[str, Dict[str, float]]:
+    """
+    Function to measure the throughput and peak memory of whole games
+
+    Parameters
+    ----------
+    rounds : int
+        number of rounds per scenario
+    decks : Sequence[int]
+        numbers of decks to use
+    seats : Sequence[int]
+        numbers of seats (players for `Game`, agents for `GameWAgents`)
+
+    Returns
+    -------
+    results : Dict[str, Dict[str, float]]
+        for each scenario (e.g. game_6decks_3seats): rounds per second (rate) and peak memory in kB (peak_kb), plus
+        episodes per second (episodes_rate, rounds times agents) for the `GameWAgents` scenarios
+    """
+    from .methods import MCExploringStarts
+
+    results = {}
+    for kind in ('game', 'agents'):
+        for repeats in decks:
+            for nseats in seats:
+                def make():
+                    if kind == 'game':
+                        return Game(nplayers=nseats, nrounds=rounds, events=NULL_SINK, repeats=repeats)
+                    return GameWAgents(MCExploringStarts, nagents=nseats, nrounds=rounds, repeats=repeats)
+
+                game = make()
+                start = time.perf_counter()
+                _play(game)
+                rate = rounds / (time.perf_counter() - start)
+
+                # measure memory separately since tracing slows the game down
+                tracemalloc.start()
+                _play(make())
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                result = {'rate': rate, 'peak_kb': peak / 1024}
+                if kind == 'agents':
+                    # every agent plays one episode per round
+                    result['episodes_rate'] = rate * nseats
+                results[f"{kind}_{repeats}decks_{nseats}seats"] = result
+    return results
+
+
+def run_benchmarks(number:int = 10_000, rounds:int = 2000, decks:Sequence[int] = (1, 6, 8),
+                   seats:Sequence[int] = tuple(range(1, 8))) -> Dict:
+    """ Function to run the whole suite (see micro_benchmarks and macro_benchmarks) """
+    return {
+        'meta': {'python': sys.version.split()[0], 'platform': platform.platform(), 'time': time.time(),
+                 'number': number, 'rounds': rounds},
+        'micro': micro_benchmarks(number),
+        'macro': macro_benchmarks(rounds, decks, seats),
+    }
+
+
+def compare(results:Dict, baseline:Dict, tolerance:float = 0.2) -> List[str]:
+    """
+    Function to find the regressions against a baseline
+
+    Parameters
+    ----------
+    results : Dict
+        results of run_benchmarks
+    baseline : Dict
+        stored results of run_benchmarks
+    tolerance : float
+        allowed relative slow down (or growth of peak memory)
+
+    Returns
+    -------
+    regressions : List[str]
+        description of every regression (empty if there are none)
+    """
+    regressions = []
+    for name, rate in results['micro'].items():
+        base = baseline['micro'].get(name)
+        if base and rate < base * (1 - tolerance):
+            regressions.append(f"{name}: {rate:,.0f}/s vs baseline {base:,.0f}/s")
+
+    for name, result in results['macro'].items():
+        base = baseline['macro'].get(name)
+        if not base:
+            continue
+        # learners are compared on episodes per second (older baselines only have rounds per second)
+        key, unit = 'rate', 'rounds'
+        if 'episodes_rate' in result and 'episodes_rate' in base:
+            key, unit = 'episodes_rate', 'episodes'
+        if result[key] < base[key] * (1 - tolerance):
+            regressions.append(f"{name}: {result[key]:,.0f} {unit}/s vs baseline {base[key]:,.0f} {unit}/s")
+        if result['peak_kb'] > base['peak_kb'] * (1 + tolerance):
+            regressions.append(f"{name}: peak {result['peak_kb']:,.0f} kB vs baseline {base['peak_kb']:,.0f} kB")
+    return regressions
+
+
+def report(results:Dict) -> str:
+    """ Function to format results as a table """
+    lines = [f"{name:<24} {rate:>14,.0f} /s" for name, rate in results['micro'].items()]
+    lines += [f"{name:<24} {result['rate']:>14,.0f} rounds/s {result['peak_kb']:>10,.0f} kB peak"
+              + (f" {result['episodes_rate']:>14,.0f} episodes/s" if 'episodes_rate' in result else "")
+              for name, result in results['macro'].items()]
+    return '\n'.join(lines)
+
+
+def add_arguments(parser:argparse.ArgumentParser) -> None:
+    """ Function to add the benchmark options to a parser (shared with the command line, see cli.py) """
+    parser.add_argument('--out', help="json file to write the results to")
+    parser.add_argument('--baseline', help="json file with stored results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument('--number', type=int, default=10_000, help="calls per micro benchmark")
+    parser.add_argument('--rounds', type=int, default=2000, help="rounds per macro scenario")
+    parser.add_argument('--decks', type=int, nargs='+', default=[1, 6, 8])
+    parser.add_argument('--seats', type=int, nargs='+', default=list(range(1, 8)))
+
+
+def run(args:argparse.Namespace) -> int:
+    """ Function to run the benchmarks for parsed arguments and return the exit code (1 on a regression) """
+    results = run_benchmarks(args.number, args.rounds, args.decks, args.seats)
+    print(report(results))
+
+    if args.out:
+        with open(args.out, 'w') as fp:
+            json.dump(results, fp, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as fp:
+            regressions = compare(results, json.load(fp), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the blackjack engine and learners")
+    add_arguments(parser)
+    return run(parser.parse_args(argv))
+
+if __name__ == '__main__':
+    sys.exit(main())
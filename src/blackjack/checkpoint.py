@@ -0,0 +1,136 @@
+"""
+Binary checkpoints for agents
+
+A checkpoint is a single file:
+
+    magic (8 bytes) | header length (uint64, little endian) | json header | arrays
+
+The json header holds the metadata (state/action axes, episodes trained, ...) and the dtype, shape and offset of every
+array. Arrays start on 64 byte boundaries and are stored raw so they can be memory mapped read only --- many
+evaluator processes can share one policy without copying or parsing it.
+"""
+import json
+import struct
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .methods.tables import QTable
+
+MAGIC = b'BJCKPT01'
+_ALIGN = 64
+
+
+def _aligned(offset:int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def save_checkpoint(path:str, arrays:Dict[str, np.ndarray], meta:Dict) -> None:
+    """
+    Function to write arrays and metadata to a checkpoint
+
+    Parameters
+    ----------
+    path : str
+        output file
+    arrays : Dict[str, np.ndarray]
+        arrays to store
+    meta : Dict
+        json serializable metadata
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    # the header holds the offsets so its size must be known first --- reserve room for the offsets
+    layout = {name: {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': 0}
+              for name, array in arrays.items()}
+    header = json.dumps({'meta': meta, 'arrays': layout}).encode()
+    offset = _aligned(len(MAGIC) + 8 + len(header) + 32 * len(arrays))
+    for name, array in arrays.items():
+        layout[name]['offset'] = offset
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({'meta': meta, 'arrays': layout}).encode()
+
+    with open(path, 'wb') as fp:
+        fp.write(MAGIC)
+        fp.write(struct.pack('<Q', len(header)))
+        fp.write(header)
+        for name, array in arrays.items():
+            fp.write(bytes(layout[name]['offset'] - fp.tell()))
+            fp.write(array.tobytes())
+
+
+def load_checkpoint(path:str, mmap:bool = True) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """
+    Function to read a checkpoint
+
+    Parameters
+    ----------
+    path : str
+        checkpoint file
+    mmap : bool
+        whether to memory map the arrays read only instead of reading them into memory
+
+    Returns
+    -------
+    arrays : Dict[str, np.ndarray]
+        the stored arrays
+    meta : Dict
+        the stored metadata
+    """
+    with open(path, 'rb') as fp:
+        if fp.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a blackjack checkpoint")
+        length, = struct.unpack('<Q', fp.read(8))
+        header = json.loads(fp.read(length))
+
+        arrays = {}
+        for name, info in header['arrays'].items():
+            dtype, shape = np.dtype(info['dtype']), tuple(info['shape'])
+            if mmap:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=info['offset'], shape=shape)
+            else:
+                fp.seek(info['offset'])
+                arrays[name] = np.fromfile(fp, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+    return arrays, header['meta']
+
+
+def save_table(path:str, table:QTable, **meta) -> None:
+    """
+    Function to write a table (q function, counts and policy) to a checkpoint
+
+    Parameters
+    ----------
+    path : str
+        output file
+    table : QTable
+        table to store
+    meta : Dict
+        extra json serializable metadata (e.g. episodes trained)
+    """
+    meta.update(player_values=table.player_values, dealer_values=table.dealer_values, actions=table.actions)
+    save_checkpoint(path, {'q': table.q, 'counts': table.counts, 'policy': table.policy}, meta)
+
+
+def load_table(path:str, mmap:bool = True) -> Tuple[QTable, Dict]:
+    """
+    Function to read a table from a checkpoint
+
+    Parameters
+    ----------
+    path : str
+        checkpoint file
+    mmap : bool
+        whether to memory map the arrays read only (for evaluation) instead of reading them into memory
+
+    Returns
+    -------
+    table : QTable
+        the stored table
+    meta : Dict
+        the stored metadata
+    """
+    arrays, meta = load_checkpoint(path, mmap=mmap)
+    table = QTable(meta['player_values'], meta['dealer_values'], meta['actions'])
+    table.q, table.counts, table.policy = arrays['q'], arrays['counts'], arrays['policy']
+    return table, meta
@@ -0,0 +1,175 @@
+"""
+Command line entry point --- `blackjack train`, `blackjack evaluate`, `blackjack sweep` and `blackjack bench`
+
+    blackjack train --method mc --rounds 1000000 --decks 6 --seats 1 --checkpoint-every 100000 --out runs/mc
+    blackjack evaluate runs/mc --ci 0.005
+    blackjack sweep grid.json --out sweep.jsonl --rounds 200000 --seconds 600
+    blackjack bench --rounds 2000 --decks 1 6 --seats 1 7
+
+Only the standard library and the numpy free parts of the package are imported to build the parser, so `--help`
+starts instantly --- the methods (and so the names accepted by --method, see methods.METHODS), numpy and the
+multiprocessing machinery are imported by the subcommand that needs them.
+"""
+import argparse
+import os
+import random
+import sys
+from time import perf_counter
+
+def _rate(count:float, seconds:float) -> str:
+    return f"{count / seconds:,.0f}/s" if seconds > 0 else "inf/s"
+
+
+def train(args:argparse.Namespace) -> int:
+    """ Function to train an agent and write checkpoints along the way """
+    from .environment import GameWAgents
+    from .events import NULL_SINK
+    from .methods import METHODS
+
+    if args.method not in METHODS:
+        print(f"--method must be one of {', '.join(sorted(METHODS))}", file=sys.stderr)
+        return 2
+    rl_method = METHODS[args.method]
+    rl_kwargs = {} if args.init_val is None else {'init_val': args.init_val}
+    deck_kwargs = {'repeats': args.decks, 'penetration': args.penetration}
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    if args.workers > 1:
+        if args.method != 'mc':
+            print("--workers needs --method mc (workers share monte carlo returns)", file=sys.stderr)
+            return 2
+        from .parallel import train_parallel
+        from .players import Agent
+        agent = Agent(rl_method, **rl_kwargs)
+    else:
+        # every seat trains the same table, like the workers merging their seats
+        game = GameWAgents(rl_method, rl_kwargs, nagents=args.seats, nplayers=args.players, events=NULL_SINK,
+                           share_table=True, **deck_kwargs)
+        agent = game.agents[0]
+
+    every = args.checkpoint_every or args.rounds
+    played = 0
+    start = perf_counter()
+    while played < args.rounds:
+        nrounds = min(every, args.rounds - played)
+        if args.workers > 1:
+            seed = None if args.seed is None else args.seed + played
+            train_parallel(rl_method, rl_kwargs, nrounds, workers=args.workers, sync_every=args.sync_every, seed=seed,
+                           nagents=args.seats, nplayers=args.players, agent=agent, **deck_kwargs)
+        else:
+            game.nrounds = nrounds
+            game.play()
+        played += nrounds
+        # episodes in the saved table (from every seat)
+        episodes = agent.episodes if args.workers > 1 else sum(seat.episodes for seat in game.agents)
+
+        elapsed = perf_counter() - start
+        message = f"{played:,} rounds  {elapsed:.1f}s  {_rate(played, elapsed)}"
+        if args.out:
+            os.makedirs(args.out, exist_ok=True)
+            agent.save(args.out, episodes=episodes)
+            message += f"  checkpoint {os.path.join(args.out, 'agent.ckpt')}"
+        print(message)
+
+    elapsed = perf_counter() - start
+    visited = int((agent.table.counts > 0).sum())
+    print(f"trained {args.method} for {played:,} rounds ({args.seats} seats, {args.decks} decks) in {elapsed:.1f}s"
+          f" --- {_rate(played, elapsed)} rounds, {episodes:,} episodes ({_rate(episodes, elapsed)}),"
+          f" {visited}/{agent.table.counts.size} state-actions visited")
+    return 0
+
+
+def evaluate(args:argparse.Namespace) -> int:
+    """ Function to estimate the expected value per hand of a checkpointed policy """
+    from .checkpoint import load_table
+    from .evaluation import evaluate_policy
+
+    path = os.path.join(args.checkpoint, 'agent.ckpt') if os.path.isdir(args.checkpoint) else args.checkpoint
+    table, meta = load_table(path)
+    results = evaluate_policy(table.policy_func, ci_width=args.ci, confidence=args.confidence, max_hands=args.hands,
+                              repeats=args.decks, seed=args.seed)
+
+    print(f"{path}: ev {results['ev']:+.5f} (std {results['std']:.4f}, "
+          f"{args.confidence:.0%} ci [{results['ci_low']:+.5f}, {results['ci_high']:+.5f}])")
+    print(f"{results['hands']:,} hands at {results['hands_per_sec']:,.0f} hands/s"
+          + ("" if results['converged'] else f" --- stopped before reaching a ci width of {args.ci}"))
+    return 0
+
+
+def sweep(args:argparse.Namespace) -> int:
+    """ Function to run a sweep from a json grid (see sweep.py) """
+    import json
+    from .sweep import run_sweep
+
+    with open(args.grid) as fp:
+        grid = json.load(fp)
+    start = perf_counter()
+    ran, failed = run_sweep(grid, args.out, rounds=args.rounds, seconds=args.seconds, workers=args.workers,
+                            eval_hands=args.eval_hands)
+    print(f"ran {ran} jobs in {perf_counter() - start:.1f}s, results in {args.out}"
+          + (f" --- {failed} failed (see the error of their rows, run again to retry them)" if failed else ""))
+    return 1 if failed else 0
+
+
+def bench(args:argparse.Namespace) -> int:
+    """ Function to run the benchmark suite (see benchmarks.py) """
+    from .benchmarks import run
+    return run(args)
+
+
+def make_parser() -> argparse.ArgumentParser:
+    """ Function to build the parser with one sub parser per command """
+    from .benchmarks import add_arguments
+
+    parser = argparse.ArgumentParser(prog='blackjack', description="Train, evaluate and benchmark blackjack agents")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parser_train = commands.add_parser('train', help="train an agent")
+    parser_train.add_argument('--method', default='mc', help="rl method: mc, qlearning or sarsa")
+    parser_train.add_argument('--rounds', type=int, default=100_000, help="number of rounds to play")
+    parser_train.add_argument('--decks', type=int, default=1, help="number of decks in the shoe")
+    parser_train.add_argument('--penetration', type=float, default=None,
+                              help="fraction of the shoe dealt before reshuffling (every round by default)")
+    parser_train.add_argument('--seats', type=int, default=1, help="number of agents at the table")
+    parser_train.add_argument('--players', type=int, default=0, help="number of other (fixed policy) players")
+    parser_train.add_argument('--workers', type=int, default=1, help="number of processes (mc only)")
+    parser_train.add_argument('--sync-every', type=int, default=1000, help="rounds between syncs of the workers")
+    parser_train.add_argument('--checkpoint-every', type=int, default=0,
+                              help="rounds between checkpoints (only at the end by default)")
+    parser_train.add_argument('--init-val', type=float, default=None, help="initial value of the q function")
+    parser_train.add_argument('--seed', type=int, default=None)
+    parser_train.add_argument('--out', help="directory for the checkpoint (agent.ckpt)")
+    parser_train.set_defaults(func=train)
+
+    parser_evaluate = commands.add_parser('evaluate', help="evaluate a checkpointed policy")
+    parser_evaluate.add_argument('checkpoint', help="agent.ckpt or the directory holding it")
+    parser_evaluate.add_argument('--hands', type=int, default=10**7, help="maximum number of hands")
+    parser_evaluate.add_argument('--ci', type=float, default=0.01, help="target width of the confidence interval")
+    parser_evaluate.add_argument('--confidence', type=float, default=0.95)
+    parser_evaluate.add_argument('--decks', type=int, default=1, help="number of decks in the shoe")
+    parser_evaluate.add_argument('--seed', type=int, default=None)
+    parser_evaluate.set_defaults(func=evaluate)
+
+    parser_sweep = commands.add_parser('sweep', help="train every configuration of a grid (resumable)")
+    parser_sweep.add_argument('grid', help="json file with the grid (see sweep.py)")
+    parser_sweep.add_argument('--out', default='sweep.jsonl', help="results file, finished jobs in it are skipped")
+    parser_sweep.add_argument('--rounds', type=int, default=100_000, help="most rounds per job")
+    parser_sweep.add_argument('--seconds', type=float, default=None, help="most seconds of training per job")
+    parser_sweep.add_argument('--workers', type=int, default=None, help="number of processes (all cpus by default)")
+    parser_sweep.add_argument('--eval-hands', type=int, default=10**6, help="hands to evaluate each policy with")
+    parser_sweep.set_defaults(func=sweep)
+
+    parser_bench = commands.add_parser('bench', help="benchmark the engine and learners")
+    add_arguments(parser_bench)
+    parser_bench.set_defaults(func=bench)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = make_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
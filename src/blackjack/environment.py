@@ -1,13 +1,16 @@
+from .events import EventSink, ConsoleSink, NULL_SINK, ROUND
 from .players import Dealer, Player, IPlayer, Agent
-from .round import start_round, play_round, cleanup_round
+from .profiling import PhaseStats
+from .round import RoundKernel
+from .stats import ConvergenceMonitor, OutcomeTracker
 
 class Game(object):
     """
     Class to play a game of blackjack with an arbitary number of players
 
-    TODO: Think about what high level metrics should be kept across rounds --- scores? Wins?
+    The outcomes of every seat are tracked across rounds in constant memory (see `track` and stats.py)
     """
-    def __init__(self, nplayers:int = 1, nrounds:int = 1, **kwargs):
+    def __init__(self, nplayers:int = 1, nrounds:int = 1, events:EventSink = None, **kwargs):
         """
         Initialization function for a game
 
@@ -15,6 +18,10 @@ class Game(object):
         ----------
         nplayers : int
             the number of players (not including the dealer) playing the game
+        nrounds : int
+            the number of rounds to play
+        events : EventSink, default=ConsoleSink()
+            where to report what happens in the game (see events.py)
         kwargs : Dict
             keyword arguments for the Deck:
 
@@ -22,22 +29,86 @@ class Game(object):
                 whether to shuffle the deck
             repeats : int
                 the number of decks to use for the game
+            penetration : float
+                fraction of the shoe dealt before it is reshuffled (the shoe is reshuffled every round by default)
+            shuffle_batch : int
+                number of shuffled orders of the shoe to generate at once with numpy
         """
         super(Game, self).__init__()
         self.dealer = Dealer(**kwargs)
         self.players = [Player() for i in range(nplayers)]
         self.nrounds = nrounds
+        self.events = self.dealer.events = ConsoleSink() if events is None else events
+        self.track()
 
     def __repr__(self) -> str:
         return f"Game"
 
+    # stops the game early when set (see GameWAgents)
+    monitor = None
+
+    def _converged(self) -> bool:
+        return False
+
+    def track(self, window: int = 1000, every: int = None, callback=None) -> None:
+        """
+        Function to (re)start tracking the outcomes of every seat
+
+        Parameters
+        ----------
+        window : int, default=1000
+            number of recent rounds for the windowed rates
+        every : int, optional
+            number of rounds between snapshots passed to callback
+        callback : Callable[[Dict], None], optional
+            function receiving a snapshot every `every` rounds
+        """
+        self.outcomes = [OutcomeTracker(window) for player in self.players]
+        self.rounds_played = 0
+        self.converged_at = None
+        self.snapshot_every = every
+        self.on_snapshot = callback
+
+    def snapshot(self) -> dict:
+        """ Function to get the outcomes of every seat so far (see OutcomeTracker.snapshot) """
+        return {'rounds': self.rounds_played, 'players': [outcomes.snapshot() for outcomes in self.outcomes]}
+
+    def _record(self, busted, results) -> None:
+        """ Function to add the results of a round to the outcomes """
+        dealer_busted = busted[0]
+        for i, outcomes in enumerate(self.outcomes):
+            outcomes.add(results[i], busted[i + 1], dealer_busted)
+
+        self.rounds_played += 1
+        if self.snapshot_every and self.rounds_played % self.snapshot_every == 0:
+            self.on_snapshot(self.snapshot())
+
+    def instrument(self, on: bool = True) -> None:
+        """
+        Function to turn the per phase timings and counters on (or off) for this table (see profiling.py)
+
+        Parameters
+        ----------
+        on : bool, default=True
+            whether to record stats
+        """
+        stats = PhaseStats() if on else None
+        for player in [self.dealer] + self.players:
+            player.stats = stats
+
+    @property
+    def stats(self):
+        """ Snapshot of the timings and counters (None when the game is not instrumented) """
+        if self.dealer.stats is None:
+            return None
+        return self.dealer.stats.snapshot()
+
     def show_score(self) -> None:
         # show scores of the players
 
         # preallocate list
         winners = [False] * (len(self.players)+1)
         for i, player in enumerate(self.players):
-            print(f'Players {i} final score: {player.total}')
             if player.total > self.dealer.total and not player.bust:
                 # if you beat the dealer and did not bust
                 winners[i] = True
@@ -45,45 +116,54 @@ class Game(object):
                 # if the dealer busted and you did not bust
                 winners[i] = True
 
-        print(f"Dealer's score: {self.dealer.total}")
+        winners = [str(i) for i, winner in enumerate(winners) if winner]
 
-        winners = [str(i) for winner in winners if winner]
-        
-        if winners:
-            print(f"Winning players were: {', '.join(winners)}")
-        else:
-            print('Bummer no one beat the house ... :(')
+        self.events.emit('scores', players=[player.total for player in self.players], dealer=self.dealer.total,
+                         winners=winners)
 
     def play(self) -> None:
         # NOTE: Think about what metrics should be tracked ...
+        events = self.events
+        kernel = RoundKernel(self.dealer, self.players)
         for i in range(self.nrounds):
-            print(f'Starting round {i} ...')
-            self.dealer.reset_deck()
-            start_round(self.dealer, self.players)
-            play_round(self.dealer, self.players)
-            self.show_score()
-            this_score, this_busted = cleanup_round(self.dealer, self.players)
+            if events.level >= ROUND:
+                events.emit('round_start', round=i)
+            self.dealer.prepare_shoe()
+            kernel.deal()
+            kernel.play()
+            if events.level >= ROUND:
+                self.show_score()
+            _, busted, results = kernel.settle()
+            self._record(busted, results)
+            monitor = self.monitor
+            if monitor is not None and self.rounds_played % monitor.window == 0 and self._converged():
+                self.converged_at = self.rounds_played
+                if events.level >= ROUND:
+                    events.emit('converged', round=i, **monitor.last)
+                break
 
 class InteractiveGame(Game):
     """ Class for an interactive Game --- assuming the player is the interactive portion """
-    def __init__(self, nplayers: int = 1, nrounds: int = 1, **kwargs):
+    def __init__(self, nplayers: int = 1, nrounds: int = 1, events: EventSink = None, **kwargs):
         print("NOTE: There is only one player supported for interactive games right now ...")
         # new constructor
         self.dealer = Dealer(**kwargs)
         self.players = [IPlayer()]
         self.nrounds = nrounds
+        self.events = self.dealer.events = ConsoleSink() if events is None else events
+        self.track()
 
 # TODO: does this need to be a separate class?
-# Functionality to add here:
-# 1. Turn off printing
-# ...
 class GameWAgents(Game):
     """
     Class to play blackjack with reinforcement learning agents that are learning to play 
-   
+
+    Nothing is printed by default (see events.py to follow the game)
     """
-    def __init__(self, rl_method, rl_kwargs={}, nagents: int=1, nplayers: int = 0, nrounds: int = 1, **kwargs):
-        super().__init__(nplayers, nrounds, **kwargs)
+    def __init__(self, rl_method, rl_kwargs={}, nagents: int=1, nplayers: int = 0, nrounds: int = 1,
+                 events: EventSink = NULL_SINK, monitor: ConvergenceMonitor = None, share_table: bool = False,
+                 **kwargs):
+        super().__init__(nplayers, nrounds, events, **kwargs)
         """
         Initialization function for a game
 
@@ -99,6 +179,13 @@ class GameWAgents(Game):
             number of players (not including the dealer) playing the game
         nrounds : int, default=1
             number of rounds to play
+        events : EventSink, default=NULL_SINK
+            where to report what happens in the game (see events.py)
+        monitor : ConvergenceMonitor, optional
+            stops playing before nrounds once the agents tables have converged (see stats.py)
+        share_table : bool, default=False
+            whether every agent learns into the table of the first agent (one policy trained by all the seats)
+            instead of each agent keeping its own
         kwargs : Dict
             keyword arguments for the Deck:
 
@@ -108,4 +195,51 @@ class GameWAgents(Game):
                 the number of decks to use for the game
         """
         # add the agents into the game at the end so they can count cards ...
-        self.players += [Agent(rl_method, **rl_kwargs) for i in range(nagents)]
\ No newline at end of file
+        self.players += [Agent(rl_method, **rl_kwargs) for i in range(nagents)]
+        if share_table:
+            for agent in self.agents[1:]:
+                agent.share_table(self.agents[0])
+        self.rl_method = rl_method
+        self.rl_kwargs = rl_kwargs
+        self.monitor = monitor
+        self.track()
+
+    @property
+    def agents(self):
+        return [player for player in self.players if isinstance(player, Agent)]
+
+    def _converged(self) -> bool:
+        return self.monitor.check([agent.table for agent in self.agents])
+
+    def play_parallel(self, workers: int = None, sync_every: int = 1000, seed: int = None) -> Agent:
+        """
+        Function to play the rounds on several processes, each with its own copy of this table, and merge what the
+        agents learn (see parallel.py)
+
+        Parameters
+        ----------
+        workers : int, optional
+            number of worker processes (defaults to the number of cpus)
+        sync_every : int, default=1000
+            number of rounds a worker plays between syncs with the coordinator
+        seed : int, optional
+            seed for the workers (worker i uses seed + i)
+
+        Returns
+        -------
+        agent : Agent
+            agent holding the merged policy, q function and returns --- copied to the agents of this game
+        """
+        # imported here so the multiprocessing machinery is only loaded when needed
+        from .parallel import train_parallel
+
+        agents = self.agents
+        trained = train_parallel(self.rl_method, self.rl_kwargs, self.nrounds, workers=workers, sync_every=sync_every,
+                                 seed=seed, nagents=len(agents), nplayers=len(self.players) - len(agents),
+                                 shuffle_batch=self.dealer.shuffle_batch, **self.dealer.deck_kwargs)
+        for agent in agents:
+            agent.table.q[...] = trained.table.q
+            agent.table.counts[...] = trained.table.counts
+            agent.table.policy[...] = trained.table.policy
+            agent.episodes = trained.episodes
+        return trained
\ No newline at end of file
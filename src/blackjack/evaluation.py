@@ -0,0 +1,129 @@
+"""
+Evaluation of frozen policies --- play rounds in large batches with the vectorized engine (see batch.py) until the
+confidence interval of the expected value per hand is narrow enough
+"""
+from collections.abc import Mapping
+from statistics import NormalDist
+from time import perf_counter
+from typing import Dict
+
+import numpy as np
+
+from .batch import play_rounds
+from .methods.tables import PolicyView
+from .players import Agent, Player
+from .stats import RunningMoments
+from .tools import Card, Hand
+
+# lookup tables are indexed by [player total, dealer's card value]
+_MAX_TOTAL = 32
+
+
+def _hard_hand(total:int) -> Hand:
+    """ Function to make a hand without a usable ace for a total (4-21) """
+    values = (2, total - 2) if total <= 11 else (10, total - 10) if total <= 20 else (10, 9, 2)
+    return Hand(*(Card(str(value), 'Spades', value) for value in values))
+
+
+def policy_mask(policy):
+    """
+    Function to turn a frozen policy into a vectorized policy for batch.play_rounds
+
+    Parameters
+    ----------
+    policy : Mapping[Tuple[int, int], str] or Player or Callable
+        an `Agent`'s `policy_func` (or an Agent), any `Player` whose policy only depends on its total and the
+        dealer's card (the policy is looked up for hard hands), or already vectorized
+        `f(totals, upcards) -> hit mask`
+
+    Returns
+    -------
+    player_policy : Callable[[np.ndarray, np.ndarray], np.ndarray]
+        maps the players totals and the dealers face up card to a mask of which players hit
+    """
+    if isinstance(policy, Agent):
+        policy = policy.policy_func
+
+    if isinstance(policy, PolicyView):
+        # read the policy array of the table directly
+        table = policy.table
+        i, j = table.positions(np.arange(_MAX_TOTAL)[:, None], np.arange(12)[None, :])
+        hits = (i >= 0) & (j >= 0) & (table.policy[i, j] == table.actions['hit'])
+    elif isinstance(policy, Mapping):
+        hits = np.zeros((_MAX_TOTAL, 12), dtype=bool)
+        for (total, upcard), action in policy.items():
+            hits[total, upcard] = action == 'hit'
+    elif isinstance(policy, Player):
+        hits = np.zeros((_MAX_TOTAL, 12), dtype=bool)
+        hand = policy.hand
+        try:
+            for total in range(4, 22):
+                policy.hand = _hard_hand(total)
+                for upcard in range(2, 12):
+                    hits[total, upcard] = policy.policy(upcard) == 'hit'
+        finally:
+            policy.hand = hand
+    elif callable(policy):
+        return policy
+    else:
+        raise TypeError(f"Can not evaluate a policy of type {type(policy)}")
+
+    def player_policy(totals, upcards):
+        return hits[totals, upcards]
+    return player_policy
+
+
+def evaluate_policy(policy, ci_width:float = 0.01, confidence:float = 0.95, batch_size:int = 100_000,
+                    max_hands:int = 10**8, repeats:int = 1, seed=None) -> Dict[str, float]:
+    """
+    Function to estimate the expected value per hand of a frozen policy, stopping as soon as the confidence
+    interval is narrow enough
+
+    Parameters
+    ----------
+    policy : Mapping[Tuple[int, int], str] or Player or Callable
+        the policy to evaluate (see policy_mask)
+    ci_width : float
+        stop once the confidence interval of the expected value is at most this wide
+    confidence : float
+        confidence level of the interval
+    batch_size : int
+        number of hands to play between checks
+    max_hands : int
+        stop after this many hands even if the interval is still wider than ci_width
+    repeats : int
+        the number of decks in the shoe
+    seed : int or np.random.Generator, optional
+        seed for the random generator
+
+    Returns
+    -------
+    results : Dict[str, float]
+        ev (expected value per hand), std, ci_low, ci_high, hands, hands_per_sec and converged (whether ci_width
+        was reached)
+    """
+    player_policy = policy_mask(policy)
+    rng = np.random.default_rng(seed)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    moments = RunningMoments()
+
+    start = perf_counter()
+    half_width = float('inf')
+    while moments.count < max_hands and 2 * half_width > ci_width:
+        n = min(batch_size, max_hands - moments.count)
+        _, _, results = play_rounds(n, player_policy=player_policy, repeats=repeats, seed=rng)
+        results = results.ravel().astype(np.float64)
+        mean = float(results.mean())
+        moments.merge(len(results), mean, float(((results - mean) ** 2).sum()))
+        half_width = z * moments.stderr
+    elapsed = perf_counter() - start
+
+    return {
+        'ev': moments.mean,
+        'std': moments.std,
+        'ci_low': moments.mean - half_width,
+        'ci_high': moments.mean + half_width,
+        'hands': moments.count,
+        'hands_per_sec': moments.count / elapsed,
+        'converged': 2 * half_width <= ci_width,
+    }
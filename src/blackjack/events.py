@@ -0,0 +1,104 @@
+"""
+Event sinks for the game --- the round loop reports what happens (cards dealt, decisions, scores) to a sink instead
+of printing so printing can be turned off when training
+
+The round loop only builds an event when the sink's level asks for it:
+
+    if events.level >= ACTION:
+        events.emit('decision', ...)
+
+so a disabled sink costs one attribute lookup and comparison per event
+"""
+from typing import Any, Dict, List, Tuple
+
+# levels of detail --- a sink receives every event at or below its level
+SILENT = 0
+ROUND = 1  # start and end of rounds
+ACTION = 2  # every decision and card
+
+
+class EventSink(object):
+    """
+    Base sink which ignores every event --- this is the default for training
+
+    Attributes
+    ----------
+    level : int
+        the most detailed level of events the sink receives (SILENT, ROUND or ACTION)
+    """
+    def __init__(self, level:int = SILENT):
+        self.level = level
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(level={self.level})"
+
+    def emit(self, event:str, **data) -> None:
+        """
+        Function to receive an event
+
+        Parameters
+        ----------
+        event : str
+            name of the event
+        data : Dict[str, Any]
+            details of the event
+        """
+        pass
+
+
+NULL_SINK = EventSink()
+
+
+class ConsoleSink(EventSink):
+    """ Sink that prints the events in a human readable way """
+    def __init__(self, level:int = ACTION):
+        super().__init__(level)
+
+    def emit(self, event:str, **data) -> None:
+        if event == 'decision':
+            print(f"--Dealers Value: {data['dealers_value']}\n--Players Total: {data['total']}")
+            if data['action'] != 'stay':
+                print('\tDealing another card to them')
+        elif event == 'turn':
+            print(f"Dealing player {data['seat']} ...")
+        elif event == 'dealer_turn':
+            print("Dealer finishing the round")
+        elif event == 'round_start':
+            print(f"Starting round {data['round']} ...")
+        elif event == 'scores':
+            for i, score in enumerate(data['players']):
+                print(f'Players {i} final score: {score}')
+            print(f"Dealer's score: {data['dealer']}")
+            if data['winners']:
+                print(f"Winning players were: {', '.join(str(i) for i in data['winners'])}")
+            else:
+                print('Bummer no one beat the house ... :(')
+        elif event == 'new_deck':
+            print("Dealer ran out of cards, grabbing a new deck")
+        elif event == 'converged':
+            print(f"Converged after round {data['round']} ({data['policy_changes']} policy changes, "
+                  f"max q change {data['max_q_change']:.4f}, coverage {data['coverage']:.0%})")
+        else:
+            print(f"{event}: {data}")
+
+
+class BufferSink(EventSink):
+    """
+    Sink that collects the events into a buffer for later processing
+
+    Attributes
+    ----------
+    buffer : List[Tuple[str, Dict[str, Any]]]
+        the events (name and details) in the order they happened
+    """
+    def __init__(self, level:int = ACTION):
+        super().__init__(level)
+        self.buffer = []
+
+    def emit(self, event:str, **data) -> None:
+        self.buffer.append((event, data))
+
+    def drain(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """ Function to return the collected events and empty the buffer """
+        events, self.buffer = self.buffer, []
+        return events
@@ -0,0 +1,142 @@
+"""
+Exact probabilities for the dealer's final total under the `Dealer.policy` stand on 17 rule
+
+Instead of simulating millions of dealer hands, the distribution of the dealer's final total (17-21 or bust) for an
+up card is computed by recursing over the cards the dealer can draw --- either from an infinite deck (every rank
+equally likely) or from a finite shoe given by its remaining counts per card value. Results are cached with a
+bounded LRU keyed by (up card, remaining counts).
+"""
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+
+from .tools import VALUES
+
+# the dealer's final totals: 17, 18, 19, 20, 21 and bust (last)
+DEALER_TOTALS = (17, 18, 19, 20, 21)
+BUST = len(DEALER_TOTALS)
+
+# card values 2-11 and how likely each one is in an infinite deck (10, Jack, Queen and King are worth 10)
+CARD_VALUES = tuple(range(2, 12))
+INFINITE_DECK = tuple(VALUES[:-1].count(value) / 13 if value < 11 else 1 / 13 for value in CARD_VALUES)
+
+CACHE_SIZE = 4096
+
+_counts = Tuple[int, ...]
+_distribution = Tuple[float, ...]
+
+
+def shoe_counts(repeats:int = 1, exclude:Sequence[int] = ()) -> _counts:
+    """
+    Function to get the number of cards of each value (2-11) in a shoe
+
+    Parameters
+    ----------
+    repeats : int
+        the number of decks in the shoe
+    exclude : Sequence[int]
+        values of cards that have already been dealt
+
+    Returns
+    -------
+    counts : Tuple[int]
+        number of cards for each value in CARD_VALUES
+    """
+    counts = [4 * repeats * (VALUES[:-1].count(value) if value < 11 else 1) for value in CARD_VALUES]
+    for value in exclude:
+        counts[value - 2] -= 1
+    return tuple(counts)
+
+
+def _add_card(total:int, soft_aces:int, value:int) -> Tuple[int, int]:
+    """ Function to add a card to a hand (total and aces counted as 11) """
+    total += value
+    soft_aces += value == 11
+    if total > 21 and soft_aces > 0:
+        total -= 10
+        soft_aces -= 1
+    return total, soft_aces
+
+
+def _play_dealer(total:int, soft_aces:int, counts:Optional[_counts], memo:Dict) -> _distribution:
+    """ Function to get the distribution of the final total from a dealer's hand and the cards left """
+    if total > 21:
+        return (0.,) * BUST + (1.,)
+    if total >= 17:
+        return tuple(float(total == final) for final in DEALER_TOTALS) + (0.,)
+
+    key = (total, soft_aces, counts)
+    if key in memo:
+        return memo[key]
+
+    distribution = [0.] * (BUST + 1)
+    if counts is None or not sum(counts):
+        # infinite deck (or a fresh deck once the shoe runs out)
+        for value, p in zip(CARD_VALUES, INFINITE_DECK):
+            for k, q in enumerate(_play_dealer(*_add_card(total, soft_aces, value), None, memo)):
+                distribution[k] += p * q
+    else:
+        n = sum(counts)
+        for i, count in enumerate(counts):
+            if count == 0:
+                continue
+            remaining = counts[:i] + (count - 1,) + counts[i+1:]
+            sub = _play_dealer(*_add_card(total, soft_aces, CARD_VALUES[i]), remaining, memo)
+            for k, q in enumerate(sub):
+                distribution[k] += count / n * q
+
+    memo[key] = result = tuple(distribution)
+    return result
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _dealer_distribution(upcard:int, counts:Optional[_counts]) -> _distribution:
+    """ Cached version of `dealer_distribution` --- counts has to be a tuple (or None) to be hashed """
+    return _play_dealer(*_add_card(0, 0, upcard), counts, {})
+
+
+def dealer_distribution(upcard:int, counts:Optional[Sequence[int]] = None) -> _distribution:
+    """
+    Function to get the distribution of the dealer's final total given the face up card
+
+    Parameters
+    ----------
+    upcard : int
+        value of the dealer's face up card (2-11)
+    counts : Sequence[int], optional
+        number of cards of each value (2-11) left in the shoe, not including the up card (see shoe_counts) ---
+        an infinite deck is used when this is None
+
+    Returns
+    -------
+    distribution : Tuple[float]
+        probability of the dealer finishing with 17, 18, 19, 20, 21 and busting (last)
+    """
+    return _dealer_distribution(upcard, None if counts is None else tuple(counts))
+
+
+def outcome_probabilities(player_total:int, upcard:int,
+                          counts:Optional[Sequence[int]] = None) -> Tuple[float, float, float]:
+    """
+    Function to get the probability of winning, pushing and losing when staying on a total
+
+    Parameters
+    ----------
+    player_total : int
+        player's final total
+    upcard : int
+        value of the dealer's face up card (2-11)
+    counts : Sequence[int], optional
+        number of cards of each value (2-11) left in the shoe (see dealer_distribution)
+
+    Returns
+    -------
+    win, push, loss : float
+        probabilities of each outcome for the player (see round.calc_winner)
+    """
+    if player_total > 21:
+        return 0., 0., 1.
+
+    distribution = dealer_distribution(upcard, counts)
+    win = distribution[BUST] + sum(p for total, p in zip(DEALER_TOTALS, distribution) if total < player_total)
+    push = sum(p for total, p in zip(DEALER_TOTALS, distribution) if total == player_total)
+    return win, push, 1. - win - push
@@ -1,6 +1,8 @@
-from ._base_ import RLMethod, _state, _state_and_action, iterative_mean
+from ._base_ import RLMethod, _state_and_action, iterative_mean
+from .tables import QTable
+from .offline import aggregate_returns
 from random import choice
-from typing import Dict, Tuple
+from typing import Dict, Iterable, Tuple
 
 class MCExploringStarts(RLMethod):
     """
@@ -11,9 +13,9 @@ class MCExploringStarts(RLMethod):
         assert isinstance(init_val, (int,float)) or callable(init_val), "initial value must either be a float, int or callable" 
         self.init_val = init_val
 
-    def _init_policy(self, player_values, dealer_values, actions) -> Dict[_state, str]:
+    def _init_table(self, player_values, dealer_values, actions) -> QTable:
         """ 
-        Function to initialize the policy function --- policy intakes the state and then chooses an action 
+        Function to initialize a dense table holding the q function, counts and policy (see tables.py)
 
         Parameters
         ----------
@@ -26,41 +28,14 @@ class MCExploringStarts(RLMethod):
 
         Returns
         -------
-        policy_func : Dict[_state, str]
-            an initialized poliy
+        table : QTable
+            table with the initial values and a random policy
         """
-        policy_func = {}
-        for player_value, dealer_value in [(player_value, dealer_value)  for player_value in  player_values for dealer_value in dealer_values]:
-            # TODO: check this random initialization
-            policy_func[(player_value, dealer_value)] = choice(list(actions.keys()))
-
-        return policy_func
-
-    def _init_q_func(self, player_values, dealer_values, actions) -> Dict[_state_and_action, float]:
-        """ 
-        Function to init the state-action function --- will estimate the return from the current state and action 
-        
-        Parameters
-        ----------
-        player_values : List[int]
-            possible values for the agents hand
-        dealer_values : List[int]
-            possible values for the dealers face up card
-        actions : Dict[str, int]
-            possible actions
-
-        Returns
-        -------
-        q_func : Dict[_state_and_action, float]
-            initialized state-action function
-        """
-        q_func = {}
-
-        for player_value, dealer_value, action in [(player_value, dealer_value, action) for player_value in player_values for dealer_value in dealer_values for action in actions.keys()]:
-            val = self.init_val if isinstance(self.init_val, (float, int)) else self.init_val()
-            q_func[player_value, dealer_value, action] = val
-
-        return q_func
+        table = QTable(player_values, dealer_values, actions, init_val=self.init_val)
+        codes = list(table.actions.values())
+        for index in range(table.policy.size):
+            table.policy.flat[index] = choice(codes)
+        return table
 
     def policy_evaluation(self, state_w_action, current_val, q_func, returns) -> Tuple[Dict[_state_and_action, float], Dict[_state_and_action, float]]:
         """ 
@@ -92,35 +67,38 @@ class MCExploringStarts(RLMethod):
         q_func[state_w_action] = new_return
         return q_func, returns
 
-    def policy_improvement(self, current_state, actions, policy_func, q_func) -> Dict[_state, str]:
-        """ 
-        Function to update the policy --- make it greedy wrt to the current state-action function
-        
+    def evaluate(self, table, index, value) -> None:
+        table.evaluate(*index, value)
+
+    def improve(self, table, index) -> None:
+        table.improve(*index)
+
+    def learn_offline(self, table, batches:Iterable[Dict], first_visit:bool = True, discount:float = 1.0) -> int:
+        """
+        Function to learn from logged episodes in batches --- the returns of every batch are merged into the table
+        with bincount reductions (see offline.py) and the policy is made greedy over the whole table at the end
+
         Parameters
         ----------
-        current_state : List[]
-            current state (agent's total [int], dealer's total[int])
-        actions : Dict[str, int]
-            possible actions
-        policy_func : Dict[(int, int), str]
-            current policy
-        q_func : Dict[(int, int, str), float]
-            q function
+        table : QTable
+            table holding the q function, counts and policy
+        batches : Iterable[Dict[str, np.ndarray]]
+            batches of whole episodes (see recording.read_batches)
+        first_visit : bool
+            whether only the first visit of a state-action in an episode is used
+        discount : float
+            discount per step
 
         Returns
         -------
-        policy_func : Dict[(int, int), str]
-            updated policy --- this is pass by reference but be explicity anyway
+        episodes : int
+            number of episodes learned from
         """
-        
-        # find applicable states (including the action):
-        player_value, dealer_value, _ = current_state
-        relevant_actions = [(player_value, dealer_value, action) for action in actions.keys()]
-        # setup action space where we need to find the max
-        action_space = {k:v for k,v in q_func.items() if k in relevant_actions}
-
-        # get the best action ...
-        _, _, greedy_action = max(action_space)
-
-        policy_func[current_state] = greedy_action
-        return policy_func
+        episodes = 0
+        for batch in batches:
+            counts, sums = aggregate_returns(table, batch, first_visit=first_visit, discount=discount)
+            table.merge(counts, sums)
+            if len(batch['episode']):
+                episodes += int(batch['episode'][-1] - batch['episode'][0]) + 1
+        table.improve_all()
+        return episodes
@@ -0,0 +1,172 @@
+from abc import abstractmethod
+
+from ._base_ import RLMethod, _state_and_action
+from .tables import QTable
+from random import random, randrange
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+class _TemporalDifference(RLMethod):
+    """
+    Base for one step temporal difference methods --- the q function is updated after every step towards the reward
+    plus the discounted value of the next state (see `target`) instead of waiting for the full return
+
+    Attributes
+    ----------
+    alpha : float
+        step size
+    discount : float
+        discount per step
+    epsilon : float
+        probability of a random action while learning (epsilon greedy behaviour)
+    init_val : float
+        initial value of the q function
+    """
+    online = True
+
+    def __init__(self, alpha:float = 0.05, discount:float = 1.0, epsilon:float = 0.1, init_val:float = 0) -> None:
+        self.alpha = alpha
+        self.discount = discount
+        self.epsilon = epsilon
+        self.init_val = init_val
+
+    def _init_table(self, player_values, dealer_values, actions) -> QTable:
+        """ Function to initialize a dense table (see tables.py) with a greedy policy """
+        table = QTable(player_values, dealer_values, actions, init_val=self.init_val)
+        table.improve_all()
+        return table
+
+    def behaviour(self, table, i, j) -> int:
+        """ Function to pick the action code in a state --- epsilon greedy wrt the q function """
+        if random() < self.epsilon:
+            return randrange(table.q.shape[2])
+        return int(table.policy[i, j])
+
+    @abstractmethod
+    def target(self, table, i, j, a) -> float:
+        """ Function to get the value of the next state-action used in the update """
+        pass
+
+    @abstractmethod
+    def targets(self, table, i, j, a) -> np.ndarray:
+        """ Vectorized version of `target` """
+        pass
+
+    def policy_evaluation(self, state_w_action, target, q_func, returns) -> Tuple[Dict[_state_and_action, float], Dict[_state_and_action, float]]:
+        """
+        Function to move the q (state-action) function towards a target
+
+        Parameters
+        ----------
+        state_w_action : List[(int, int), str]
+            state with the action
+        target : float
+            reward plus the discounted value of the next state
+        q_func : Dict[_state_and_action, float]
+            state-action function
+        returns : Dict[_state_and_action, Tuple[int, float]]
+            number of updates and value for each state-action
+
+        Returns
+        -------
+        q_func : Dict[_state_and_action, float]
+            updated q_func --- (this is pass by reference but be explicity anyway)
+        returns : Dict[_state_and_action, Tuple[int, float]]
+            updated returns (this is pass by reference but be explicity anyway)
+        """
+        count, value = returns[state_w_action]
+        value += self.alpha * (target - value)
+        returns[state_w_action] = (count + 1, value)
+        q_func[state_w_action] = value
+        return q_func, returns
+
+    def evaluate(self, table, index, value) -> None:
+        table.step(*index, value, self.alpha)
+
+    def improve(self, table, index) -> None:
+        table.improve(*index)
+
+    def step(self, table, previous, current) -> None:
+        """
+        Function to update the previous state-action once the next action is chosen (the reward is 0 until the end
+        of the round)
+
+        Parameters
+        ----------
+        table : QTable
+            table holding the q function, counts and policy
+        previous : Tuple[int, int, int]
+            position of the previous state-action
+        current : Tuple[int, int, int]
+            position of the state-action just chosen
+        """
+        self.evaluate(table, previous, self.discount * self.target(table, *current))
+        self.improve(table, previous[:2])
+
+    def terminal(self, table, previous, reward) -> None:
+        """ Function to update the last state-action of a round with the final reward """
+        self.evaluate(table, previous, reward)
+        self.improve(table, previous[:2])
+
+    def batch_update(self, table, index, rewards, next_index, done) -> None:
+        """
+        Function to update many transitions at once --- the targets are computed from the same q function and
+        averaged per state-action, so a state-action seen many times in a batch still takes one step of size alpha
+        (summing the steps overshoots once count * alpha > 2), then the policy is made greedy
+
+        Parameters
+        ----------
+        table : QTable
+            table holding the q function, counts and policy
+        index : Tuple[np.ndarray, np.ndarray, np.ndarray]
+            positions of the state-actions (player value, dealer value, action code)
+        rewards : np.ndarray
+            reward after each transition
+        next_index : Tuple[np.ndarray, np.ndarray, np.ndarray]
+            positions of the next state-actions (ignored when done)
+        done : np.ndarray[bool]
+            whether the transition ended the round
+        """
+        i, j, a = (np.asarray(positions, dtype=np.int64) for positions in index)
+        next_i, next_j, next_a = (np.asarray(positions, dtype=np.int64) for positions in next_index)
+        done = np.asarray(done, dtype=bool)
+        # positions of finished rounds may be anything, point them at a valid entry and zero them out
+        next_i, next_j, next_a = (np.where(done, 0, positions) for positions in (next_i, next_j, next_a))
+
+        targets = np.asarray(rewards, dtype=np.float64) + np.where(done, 0., self.discount * self.targets(table, next_i, next_j, next_a))
+        flat = np.ravel_multi_index((i, j, a), table.q.shape)
+        counts = np.bincount(flat, minlength=table.q.size).reshape(table.q.shape)
+        deltas = np.bincount(flat, weights=targets - table.q[i, j, a], minlength=table.q.size).reshape(table.q.shape)
+        seen = counts > 0
+        previous = table.q[seen]
+        table.q[seen] += self.alpha * deltas[seen] / counts[seen]
+        table._track(previous, table.q[seen], counts[seen])
+        table.counts += counts
+
+        greedy = table.q[i, j].argmax(axis=1)
+        table.policy_changes += int(len(np.unique((i * table.q.shape[1] + j)[greedy != table.policy[i, j]])))
+        table.policy[i, j] = greedy
+
+
+class QLearning(_TemporalDifference):
+    """
+    Class for q-learning --- off policy, the update uses the greedy value of the next state
+    """
+    def target(self, table, i, j, a) -> float:
+        return table.q[i, j].max()
+
+    def targets(self, table, i, j, a) -> np.ndarray:
+        return table.q[i, j].max(axis=1)
+
+
+class SARSA(_TemporalDifference):
+    """
+    Class for sarsa --- on policy, the update uses the value of the next action chosen by the behaviour policy
+    """
+    def target(self, table, i, j, a) -> float:
+        return table.q[i, j, a]
+
+    def targets(self, table, i, j, a) -> np.ndarray:
+        return table.q[i, j, a]
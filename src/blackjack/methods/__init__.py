@@ -1 +1,9 @@
-from .MonteCarlo import MCExploringStarts
\ No newline at end of file
+from .MonteCarlo import MCExploringStarts
+from .TemporalDifference import QLearning, SARSA
+from .tables import QTable
+# rl methods by the names used on the command line and in sweep configs
+METHODS = {
+    'mc': MCExploringStarts,
+    'qlearning': QLearning,
+    'sarsa': SARSA,
+}
@@ -1,7 +1,7 @@
 from abc import ABC, abstractclassmethod
 from functools import wraps
 from random import random
-from typing import Tuple
+from typing import Dict, Tuple
 
 # setup helpers for types
 _state = Tuple[int, int]
@@ -60,13 +60,83 @@ class RLMethod(ABC):
     Reinforemcent learning algorithms will be responsible for two functions:
     1. providing a method to update the policy --- policy improvement
     2. providing a method to update the state-action (value function) --- policy evaluation
+
+    Methods that learn after every step (instead of at the end of the round) set `online` and provide `step` and
+    `terminal` (see TemporalDifference.py)
     """
-    @abstractclassmethod
-    def policy_improvement(self):
-        """ Function to update a given policy """
-        pass
+    online = False
+
+    def policy_improvement(self, current_state, actions, policy_func, q_func) -> Dict[_state, str]:
+        """
+        Function to update the policy --- make it greedy wrt to the current state-action function
+
+        Parameters
+        ----------
+        current_state : List[]
+            current state (agent's total [int], dealer's total[int]) --- an action after the state is ignored
+        actions : Dict[str, int]
+            possible actions
+        policy_func : Dict[(int, int), str]
+            current policy
+        q_func : Dict[(int, int, str), float]
+            q function
+
+        Returns
+        -------
+        policy_func : Dict[(int, int), str]
+            updated policy --- this is pass by reference but be explicity anyway
+        """
+        # imported here since tables.py imports this module
+        from .tables import PolicyView
+
+        # the state may include the action
+        player_value, dealer_value = current_state[:2]
+        if isinstance(policy_func, PolicyView):
+            policy_func.table.improve(*policy_func.table.index(player_value, dealer_value))
+            return policy_func
+
+        # get the best action (ties go to the lowest action code like argmax) ...
+        greedy_action = max(sorted(actions, key=actions.get), key=lambda action: q_func[player_value, dealer_value, action])
+
+        policy_func[player_value, dealer_value] = greedy_action
+        return policy_func
 
     @abstractclassmethod
     def policy_evaluation(self):
         """ Function to update a given state-action function """
         pass
+
+    def behaviour(self, table, i, j) -> int:
+        """ Function to pick the action code in a state while learning --- defaults to the policy """
+        return int(table.policy[i, j])
+
+    def evaluate(self, table, index, value) -> None:
+        """
+        Function to run policy evaluation on a dense table (see tables.py) given array positions
+
+        Defaults to `policy_evaluation` through the dict views of the table, methods can override this with a direct
+        array update
+
+        Parameters
+        ----------
+        table : QTable
+            table holding the q function, counts and policy
+        index : Tuple[int, int, int]
+            position of the state-action (player value, dealer value, action code)
+        value : float
+            current return for this episode
+        """
+        self.policy_evaluation(table.key(*index), value, table.q_func, table.return_func)
+
+    def improve(self, table, index) -> None:
+        """
+        Function to run policy improvement on a dense table (see tables.py) given array positions
+
+        Parameters
+        ----------
+        table : QTable
+            table holding the q function, counts and policy
+        index : Tuple[int, int]
+            position of the state (player value, dealer value)
+        """
+        self.policy_improvement(table.key(*index), table.actions, table.policy_func, table.q_func)
@@ -0,0 +1,103 @@
+"""
+Vectorized helpers to learn from logged episodes (see recording.py) instead of replaying rounds
+
+A batch holds whole episodes as per-step arrays (player total, dealer value, action code, episode and final reward).
+Returns come from one vectorized reverse pass and are reduced per state-action with bincount so a batch of millions
+of steps is a handful of numpy calls.
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .tables import QTable
+
+
+def batch_returns(episode, reward, discount:float = 1.0) -> np.ndarray:
+    """
+    Function to compute the return following every step (rewards are 0 until the end of the round)
+
+    Parameters
+    ----------
+    episode : np.ndarray[int]
+        episode of every step --- steps of an episode are contiguous and in order
+    reward : np.ndarray
+        final reward of the episode of every step
+    discount : float
+        discount per step
+
+    Returns
+    -------
+    returns : np.ndarray[float64]
+        the discounted final reward for every step
+    """
+    reward = np.asarray(reward, dtype=np.float64)
+    if discount == 1.0:
+        return reward
+    # number of steps after each step in its episode
+    last = np.searchsorted(episode, episode, side='right') - 1
+    return reward * discount ** (last - np.arange(len(episode)))
+
+
+def first_visits(episode, flat) -> np.ndarray:
+    """
+    Function to find the first visit of every state-action in each episode
+
+    Parameters
+    ----------
+    episode : np.ndarray[int]
+        episode of every step
+    flat : np.ndarray[int]
+        flat position of the state-action of every step
+
+    Returns
+    -------
+    mask : np.ndarray[bool]
+        whether the step is the first visit of its state-action in its episode
+    """
+    keys = np.asarray(episode, dtype=np.int64) * (int(flat.max()) + 1 if len(flat) else 1) + flat
+    _, first = np.unique(keys, return_index=True)
+    mask = np.zeros(len(flat), dtype=bool)
+    mask[first] = True
+    return mask
+
+
+def aggregate_returns(table:QTable, batch:Dict[str, np.ndarray], first_visit:bool = True,
+                      discount:float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Function to reduce a batch of episodes to the number and sum of the returns of every state-action
+
+    Parameters
+    ----------
+    table : QTable
+        table giving the positions of the values and actions
+    batch : Dict[str, np.ndarray]
+        player, dealer, action, episode and reward for every step (see recording.read_batches)
+    first_visit : bool
+        whether only the first visit of a state-action in an episode is used
+    discount : float
+        discount per step
+
+    Returns
+    -------
+    counts : np.ndarray[int64]
+        number of returns per state-action (same shape as table.q)
+    sums : np.ndarray[float64]
+        sum of the returns per state-action
+    """
+    episode = np.asarray(batch['episode'])
+    returns = batch_returns(episode, batch['reward'], discount)
+
+    # steps with values outside of the table are skipped
+    i, j = table.positions(batch['player'], batch['dealer'])
+    shape = table.q.shape
+    flat = (i * shape[1] + j) * shape[2] + np.asarray(batch['action'], dtype=np.int64)
+
+    keep = (i >= 0) & (j >= 0)
+    if first_visit:
+        keep &= first_visits(episode, np.where(keep, flat, -1) + 1)
+    flat, returns = flat[keep], returns[keep]
+
+    size = table.q.size
+    counts = np.bincount(flat, minlength=size).reshape(shape)
+    sums = np.bincount(flat, weights=returns, minlength=size).reshape(shape)
+    return counts, sums
@@ -0,0 +1,266 @@
+"""
+Dense (array backed) state-action tables for tabular methods
+
+The q function, the visit counts and the policy are numpy arrays indexed by
+(player value, dealer value[, action]) positions with integer action codes. Dict-like views keyed by (player value,
+dealer value[, action name]) stay available for inspection and export.
+"""
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from ._base_ import _state, _state_and_action, iterative_mean
+
+
+def value_lookup(values) -> np.ndarray:
+    """ Function to make an array mapping a value to its position (-1 when the value is not in the table) """
+    lookup = np.full(max(values) + 1, -1, dtype=np.int64)
+    lookup[list(values)] = np.arange(len(values))
+    return lookup
+
+
+def lookup_positions(lookup:np.ndarray, values) -> np.ndarray:
+    """ Function to look up the positions of many values at once (-1 for values outside of the lookup) """
+    values = np.asarray(values, dtype=np.int64)
+    inside = (values >= 0) & (values < len(lookup))
+    return np.where(inside, lookup[np.clip(values, 0, len(lookup) - 1)], -1)
+
+
+class QTable(object):
+    """
+    Class holding the q function, visit counts and greedy policy as arrays
+
+    Attributes
+    ----------
+    q : np.ndarray[float64]
+        state-action values with shape (player values, dealer values, actions)
+    counts : np.ndarray[int64]
+        number of returns averaged into each state-action value
+    policy : np.ndarray[int8]
+        action code chosen in each state with shape (player values, dealer values)
+    player_index : Dict[int, int]
+        maps the player's value to the first axis
+    dealer_index : Dict[int, int]
+        maps the dealer's value to the second axis
+    actions : Dict[str, int]
+        maps the action to its code (the last axis of q)
+    action_names : List[str]
+        maps the action code to the action
+
+    The table also counts, since the last call to `convergence`, the updates, the policy entries that changed and
+    the total and largest absolute change of the q function --- kept up to date by every update, O(1) each
+    """
+    def __init__(self, player_values, dealer_values, actions, init_val = 0):
+        self.player_values = list(player_values)
+        self.dealer_values = list(dealer_values)
+        self.actions = dict(actions)
+        self.action_names = [name for name, _ in sorted(self.actions.items(), key=lambda item: item[1])]
+        self.player_index = {value: i for i, value in enumerate(self.player_values)}
+        self.dealer_index = {value: i for i, value in enumerate(self.dealer_values)}
+
+        shape = (len(self.player_values), len(self.dealer_values), len(self.actions))
+        if callable(init_val):
+            self.q = np.array([init_val() for _ in range(int(np.prod(shape)))], dtype=np.float64).reshape(shape)
+        else:
+            self.q = np.full(shape, init_val, dtype=np.float64)
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self.policy = np.zeros(shape[:2], dtype=np.int8)
+
+        self._reset_window()
+
+    def __repr__(self) -> str:
+        return f"QTable{self.q.shape}"
+
+    def index(self, player_value, dealer_value, action=None) -> Tuple[int, ...]:
+        """ Function to get the array position of a state (or a state-action when the action is given) """
+        if action is None:
+            return self.player_index[player_value], self.dealer_index[dealer_value]
+        return self.player_index[player_value], self.dealer_index[dealer_value], self.actions[action]
+
+    def positions(self, player_values, dealer_values) -> Tuple[np.ndarray, np.ndarray]:
+        """ Vectorized version of `index` for many states --- values that are not in the table get -1 """
+        return (lookup_positions(value_lookup(self.player_values), player_values),
+                lookup_positions(value_lookup(self.dealer_values), dealer_values))
+
+    def key(self, i, j, a=None) -> Tuple:
+        """ Function to get the dict key of an array position (inverse of index) """
+        if a is None:
+            return self.player_values[i], self.dealer_values[j]
+        return self.player_values[i], self.dealer_values[j], self.action_names[a]
+
+    def _reset_window(self) -> None:
+        self.updates = 0
+        self.policy_changes = 0
+        self.q_change_sum = 0.
+        self.q_change_max = 0.
+
+    def _changed(self, change) -> None:
+        """ Function to count an update of the q function by `change` (absolute) """
+        self.updates += 1
+        self.q_change_sum += change
+        if change > self.q_change_max:
+            self.q_change_max = change
+
+    def evaluate(self, i, j, a, value) -> None:
+        """ Function to average a return into the value of a state-action --- O(1) """
+        index = (i, j, a)
+        previous = self.q[index]
+        count, mean = iterative_mean(value, previous, self.counts[index])
+        self.q[index] = mean
+        self.counts[index] = count
+        self._changed(abs(mean - previous))
+
+    def step(self, i, j, a, target, alpha) -> None:
+        """ Function to move the value of a state-action towards a target by a step size (e.g. td methods) """
+        index = (i, j, a)
+        change = alpha * (target - self.q[index])
+        self.q[index] += change
+        self.counts[index] += 1
+        self._changed(abs(change))
+
+    def improve(self, i, j) -> None:
+        """ Function to make the policy greedy in one state --- argmax over the action axis, O(actions) """
+        greedy = self.q[i, j].argmax()
+        if greedy != self.policy[i, j]:
+            self.policy[i, j] = greedy
+            self.policy_changes += 1
+
+    def improve_all(self) -> None:
+        """ Function to make the policy greedy in every state """
+        greedy = self.q.argmax(axis=2)
+        self.policy_changes += int((greedy != self.policy).sum())
+        self.policy[...] = greedy
+
+    def _track(self, previous, current, counts) -> None:
+        """ Function to add a batch of changes (arrays of the old and new values of the updated entries) """
+        change = np.abs(current - previous)
+        self.updates += int(counts.sum())
+        self.q_change_sum += float(change.sum())
+        if change.size:
+            self.q_change_max = max(self.q_change_max, float(change.max()))
+
+    def convergence(self, reset:bool = True) -> Dict[str, float]:
+        """
+        Function to get how much the table changed since the last call
+
+        Parameters
+        ----------
+        reset : bool
+            whether to start a new window
+
+        Returns
+        -------
+        window : Dict[str, float]
+            updates, policy_changes (number of policy entries that changed), max_q_change, mean_q_change (per
+            update) and coverage (fraction of state-actions with at least one update)
+        """
+        window = {
+            'updates': self.updates,
+            'policy_changes': self.policy_changes,
+            'max_q_change': float(self.q_change_max),
+            'mean_q_change': float(self.q_change_sum / self.updates) if self.updates else 0.,
+            'coverage': np.count_nonzero(self.counts) / self.counts.size,
+        }
+        if reset:
+            self._reset_window()
+        return window
+
+    def merge(self, counts, sums) -> None:
+        """
+        Function to merge returns gathered elsewhere (e.g. another process) into the table
+
+        Parameters
+        ----------
+        counts : np.ndarray[int64]
+            number of new returns per state-action
+        sums : np.ndarray[float64]
+            sum of the new returns per state-action
+        """
+        new_counts = self.counts + counts
+        seen = counts > 0
+        previous = self.q[seen]
+        self.q[seen] = (previous * self.counts[seen] + sums[seen]) / new_counts[seen]
+        self._track(previous, self.q[seen], counts[seen])
+        self.counts[...] = new_counts
+
+    @property
+    def policy_func(self) -> 'PolicyView':
+        return PolicyView(self)
+
+    @property
+    def q_func(self) -> 'QView':
+        return QView(self)
+
+    @property
+    def return_func(self) -> 'ReturnView':
+        return ReturnView(self)
+
+    def export(self) -> Dict[str, Dict[str, object]]:
+        """ Function to export the policy and q function as json friendly dicts (keys joined with commas) """
+        return {
+            'policy': {','.join(map(str, key)): value for key, value in self.policy_func.items()},
+            'q_func': {','.join(map(str, key)): value for key, value in self.q_func.items()},
+        }
+
+
+class _TableView(MutableMapping):
+    """ Base for the dict views of a table """
+    def __init__(self, table:QTable):
+        self.table = table
+
+    def __delitem__(self, key) -> None:
+        raise TypeError(f"Can not delete entries of a {type(self).__name__}")
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class PolicyView(_TableView):
+    """ Dict view of the policy: (player value, dealer value) -> action """
+    def __getitem__(self, key:_state) -> str:
+        return self.table.action_names[self.table.policy[self.table.index(*key)]]
+
+    def __setitem__(self, key:_state, action:str) -> None:
+        table, index = self.table, self.table.index(*key)
+        code = table.actions[action]
+        if table.policy[index] != code:
+            table.policy[index] = code
+            table.policy_changes += 1
+
+    def __len__(self) -> int:
+        return self.table.policy.size
+
+    def __iter__(self) -> Iterator[_state]:
+        table = self.table
+        return ((p, d) for p in table.player_values for d in table.dealer_values)
+
+
+class QView(_TableView):
+    """ Dict view of the q function: (player value, dealer value, action) -> value """
+    def __getitem__(self, key:_state_and_action) -> float:
+        return float(self.table.q[self.table.index(*key)])
+
+    def __setitem__(self, key:_state_and_action, value:float) -> None:
+        self.table.q[self.table.index(*key)] = value
+
+    def __len__(self) -> int:
+        return self.table.q.size
+
+    def __iter__(self) -> Iterator[_state_and_action]:
+        table = self.table
+        return ((p, d, a) for p in table.player_values for d in table.dealer_values for a in table.actions)
+
+
+class ReturnView(QView):
+    """ Dict view of the returns: (player value, dealer value, action) -> (count, mean) """
+    def __getitem__(self, key:_state_and_action) -> Tuple[int, float]:
+        index = self.table.index(*key)
+        return int(self.table.counts[index]), float(self.table.q[index])
+
+    def __setitem__(self, key:_state_and_action, value:Tuple[int, float]) -> None:
+        # setting a return is an update of the q function (see QTable.convergence)
+        table, index = self.table, self.table.index(*key)
+        previous = table.q[index]
+        table.counts[index], table.q[index] = value
+        table._changed(abs(table.q[index] - previous))
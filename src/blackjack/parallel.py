@@ -0,0 +1,166 @@
+"""
+Parallel training for `GameWAgents` --- episodes are generated by worker processes and merged by a coordinator
+
+Monte Carlo returns are easy to aggregate: every state-action pair only needs the (count, mean) of its returns (the
+same data `Agent.return_func` holds, sent as count and sum arrays of the agent's table). Each worker plays its own table with its own shoe and seed and, every
+`sync_every` rounds, sends the statistics it gathered since the last sync to the coordinator. The coordinator merges
+them into the global statistics, makes the policy greedy with `policy_improvement` and sends the merged tables back
+to the worker, which continues learning from them. Workers never wait on each other.
+"""
+import multiprocessing as mp
+from multiprocessing.connection import wait
+import random
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .events import NULL_SINK
+from .players import Agent
+
+
+def returns_delta(table, baseline_counts, baseline_sums) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Function to get the statistics of the returns observed since a baseline
+
+    Parameters
+    ----------
+    table : QTable
+        table of the agent that has been learning
+    baseline_counts : np.ndarray[int64]
+        counts at the last sync
+    baseline_sums : np.ndarray[float64]
+        sum of the returns (count * mean) at the last sync
+
+    Returns
+    -------
+    counts : np.ndarray[int64]
+        number of new returns per state-action
+    sums : np.ndarray[float64]
+        sum of the new returns per state-action
+    """
+    return table.counts - baseline_counts, table.counts * table.q - baseline_sums
+
+
+def _worker(conn, seed, nrounds, sync_every, rl_method, rl_kwargs, nagents, nplayers, deck_kwargs, tables) -> None:
+    """ Function run by every worker process --- plays rounds and syncs with the coordinator """
+    # imported here to avoid a circular import
+    from .environment import GameWAgents
+
+    random.seed(seed)
+    game = GameWAgents(rl_method, rl_kwargs, nagents=nagents, nplayers=nplayers, events=NULL_SINK, **deck_kwargs)
+    agents = game.agents
+
+    remaining = nrounds
+    while remaining > 0:
+        q, counts, policy = tables
+        for agent in agents:
+            agent.table.q[...] = q
+            agent.table.counts[...] = counts
+            agent.table.policy[...] = policy
+        baseline_sums = counts * q
+
+        game.nrounds = min(sync_every, remaining)
+        game.play()
+        remaining -= game.nrounds
+
+        # combine the new returns of all the agents at this table
+        new_counts, new_sums = np.zeros_like(counts), np.zeros_like(q)
+        for agent in agents:
+            agent_counts, agent_sums = returns_delta(agent.table, counts, baseline_sums)
+            new_counts += agent_counts
+            new_sums += agent_sums
+
+        # every agent plays one episode per round
+        conn.send((new_counts, new_sums, game.nrounds * len(agents)))
+        tables = conn.recv()
+
+    conn.send((None, None, 0))
+    conn.close()
+
+
+def train_parallel(rl_method, rl_kwargs={}, nrounds:int = 1, workers:Optional[int] = None, sync_every:int = 1000,
+                   seed:Optional[int] = None, nagents:int = 1, nplayers:int = 0, agent:Optional[Agent] = None,
+                   **kwargs) -> Agent:
+    """
+    Function to train an agent with episodes generated by several processes
+
+    Parameters
+    ----------
+    rl_method : RLMethod
+        reinforcement learning method
+    rl_kwargs : Dict[str, ?]
+        kwargs for reinforcement learning method
+    nrounds : int
+        total number of rounds to play (split across the workers)
+    workers : int, optional
+        number of worker processes (defaults to the number of cpus)
+    sync_every : int
+        number of rounds a worker plays between syncs with the coordinator
+    seed : int, optional
+        seed for the workers (worker i uses seed + i)
+    nagents : int, default=1
+        number of agents at each worker's table
+    nplayers : int, default=0
+        number of players (not including the dealer) at each worker's table
+    agent : Agent, optional
+        agent to keep training (e.g. loaded from a checkpoint) --- a new agent is created when None
+    kwargs : Dict
+        keyword arguments for the Deck (shuffle, repeats)
+
+    Returns
+    -------
+    agent : Agent
+        agent holding the merged policy, q function and returns (and the episodes played by every worker)
+    """
+    # imported here to avoid a circular import
+    from .methods import MCExploringStarts
+
+    # the merge treats count * q as a sum of returns, which only holds for monte carlo
+    method = rl_method if agent is None else type(agent.method)
+    if not issubclass(method, MCExploringStarts):
+        raise ValueError(f"Parallel training merges monte carlo returns and needs MCExploringStarts, got {method.__name__}")
+
+    workers = workers or mp.cpu_count()
+    agent = Agent(rl_method, **rl_kwargs) if agent is None else agent
+
+    processes, conns = [], []
+    for i in range(workers):
+        # split the rounds as evenly as possible
+        this_rounds = nrounds // workers + (i < nrounds % workers)
+        this_seed = None if seed is None else seed + i
+        parent_conn, child_conn = mp.Pipe()
+        tables = (agent.table.q, agent.table.counts, agent.table.policy)
+        process = mp.Process(target=_worker, args=(child_conn, this_seed, this_rounds, sync_every, rl_method,
+                                                  rl_kwargs, nagents, nplayers, kwargs, tables), daemon=True)
+        process.start()
+        child_conn.close()
+        processes.append(process)
+        conns.append(parent_conn)
+
+    active = list(conns)
+    while active:
+        for conn in wait(active):
+            try:
+                counts, sums, episodes = conn.recv()
+                if counts is None:
+                    active.remove(conn)
+                    continue
+
+                agent.table.merge(counts, sums)
+                agent.episodes += episodes
+                # make the policy greedy in the states that were visited
+                for index in zip(*np.nonzero(counts.any(axis=2))):
+                    agent.method.improve(agent.table, index)
+                conn.send((agent.table.q, agent.table.counts, agent.table.policy))
+            except (EOFError, OSError) as exc:
+                # the worker died (its pipe closed) --- stop the others instead of waiting on them
+                i = conns.index(conn)
+                processes[i].join(1)
+                for process in processes:
+                    process.terminate()
+                raise RuntimeError(f"Worker {i} (pid {processes[i].pid}) failed with exit code {processes[i].exitcode}"
+                                   " --- see its traceback above") from exc
+
+    for process in processes:
+        process.join()
+    return agent
@@ -1,10 +1,13 @@
-from functools import wraps
 import json
 import os
 import os.path as osp
-from typing import Dict, Tuple
+import random
+from time import perf_counter
+from typing import Tuple
 
-from .tools import Hand, Deck
+from .events import NULL_SINK, ROUND
+from .tools import Hand, Deck, TableObservation
+from .trajectory import Trajectory
 
 
 # setup helpers for types
@@ -39,6 +42,9 @@ class Player(object):
         'hit': 1
     }
 
+    stats = None  # PhaseStats when the game is instrumented (see profiling.py)
+    recorder = None  # TrajectoryRecorder to log the decisions and rewards (see recording.py)
+
     def __init__(self):
         super(Player, self)
         self.hand=Hand()
@@ -47,20 +53,24 @@ class Player(object):
         return f"Player"
 
     def add_card(self, card) -> None:
-        self.hand.cards.append(card)
+        self.hand.add(card)
         return
 
     @property
     def total(self) -> int:
         return self.hand.total
+
+    @property
+    def is_soft(self) -> bool:
+        return self.hand.is_soft
     
     @property
     def bust(self) -> bool:
         return self.hand.bust
 
-    def policy(self, dealers_value, *other_palyers) -> str:
-        # the policy will be a function of this players hand, the dealers hand and possibly the other players card as well
-        # TODO: add an encoding for the other_players hands to map to a state ... need to think about how to do this  
+    def policy(self, dealers_value, observation=None) -> str:
+        # the policy will be a function of this players hand, the dealers hand and possibly the other cards on the
+        # table as well --- observation is the dealer's TableObservation (face up cards this round and the count)
         
         # hardcode a policy for now to simulate a game ...
         assumed_total = dealers_value + 8
@@ -70,7 +80,7 @@ class Player(object):
 
     def clear_hand(self) -> None:
         """ Function to reset the hand at the end of the round """
-        self.hand = Hand()
+        self.hand.reset()
 
     def end_round(self, *args, **kwargs) -> None:
         """ Function to do any end of round clean up for a player ..."""
@@ -94,7 +104,7 @@ class IPlayer(Player):
         assert action in options, f"Selected option {action} is not one of {valid_options}"
         return action
 
-    def policy(self, dealers_value) -> str:
+    def policy(self, dealers_value, observation=None) -> str:
         print(f"----Your value is {self.total} and the dealer has a face up card with a value of {dealers_value}")
 
         while True and self.total <= 21:
@@ -114,15 +124,28 @@ class Dealer(Player):
     and update their policy (method to choose an action)
 
     """
-    def __init__(self, **kwargs):
+    def __init__(self, shuffle_batch: int = 0, **kwargs):
+        """
+        Parameters
+        ----------
+        shuffle_batch : int, default=0
+            number of shuffled orders of the shoe to generate at once with numpy (see batch.shuffled_shoes) ---
+            the shoe is shuffled with random.shuffle when this is 0
+        kwargs : Dict
+            keyword arguments for the Deck (shuffle, repeats, ace_val, penetration)
+        """
         super().__init__()
         self.deck_kwargs = kwargs  # save the deck kwargs
         self.deck = Deck(shuffle=True, **kwargs)
+        self.events = NULL_SINK  # where the table reports what happens (see events.py)
+        self.shuffle_batch = shuffle_batch
+        self._orders = []
+        self.observation = TableObservation()  # what the seats can see (see tools.py)
 
     def __repr__(self) -> str:
         return f"Dealer"
     
-    def policy(self, dealers_value=None) -> str:
+    def policy(self, dealers_value=None, observation=None) -> str:
         total = self.hand.total
         if total < 17:
             return 'hit'
@@ -137,15 +160,52 @@ class Dealer(Player):
         try:
             card = self.deck.deal_card()
         except IndexError:
-            print("Dealer ran out of cards, grabbing a new deck")
+            if self.events.level >= ROUND:
+                self.events.emit('new_deck')
             self.reset_deck()
             card = self.deck.deal_card()
         player.add_card(card)
+        # the dealer's first card is face down until the dealer plays
+        if player is not self or len(self.hand) > 1:
+            self.observation.see(card)
+        if self.stats is not None:
+            self.stats.cards_dealt += 1
 
         return 
+
+    def end_round(self, *args, **kwargs) -> None:
+        self.observation.new_round()
+        self.clear_hand()
     
+    def prepare_shoe(self) -> None:
+        """ Function to reshuffle the shoe before a round once the cut card has been reached """
+        if self.deck.cut_card_reached:
+            self.reset_deck()
+
+    def _next_order(self):
+        """ Function to get the next pre-generated order of the shoe """
+        if not len(self._orders):
+            # imported here so numpy is only needed for batched shuffles
+            import numpy as np
+            from .batch import shuffled_shoes
+
+            # seed from random so random.seed still makes games reproducible
+            rng = np.random.default_rng(random.getrandbits(64))
+            self._orders = list(shuffled_shoes(self.shuffle_batch, self.deck.repeats, rng, cards=True))
+        return self._orders.pop()
+
     def reset_deck(self) -> None:
-        self.deck = Deck(shuffle=True, **self.deck_kwargs)
+        """ Function to collect every card and reshuffle the shoe in place """
+        stats = self.stats
+        if stats is not None:
+            start = perf_counter()
+
+        self.deck.reshuffle(self._next_order() if self.shuffle_batch else None)
+        self.observation.new_shoe()
+
+        if stats is not None:
+            stats.reshuffles += 1
+            stats.add('reset_deck', start)
         return
 
 
@@ -162,6 +222,8 @@ class Agent(Player):
     5. use a policy for making decisions
     6. keep track of the states
     7. keep track of the rewards
+
+    Updates use the first visit of each state-action in a round unless the agent is created with first_visit=False
     """
 
     # define action space
@@ -179,49 +241,36 @@ class Agent(Player):
     player_values = list(range(4, 22))  # 4-22 (22+ = bust) (this represents the state)
     dealer_values = list(range(2, 12))
 
-    def __init__(self, rl_method, **rl_kwargs):
+    def __init__(self, rl_method, first_visit: bool = True, **rl_kwargs):
         super().__init__()
 
         self.method = rl_method(**rl_kwargs)
-        self.states = []  # keep track of the states ...
 
-        # initialize the policy and the 
-        self.policy_func = self._init_policy()
-        self.q_func = self._init_q_func()
-        
-        # define metrics to store for the returns --- one for each state-action pair
-        self.return_func = self.make_return_func(self.q_func)
+        # initialize the policy and the q function as arrays (see methods/tables.py)
+        self.table = self._init_table()
+        # keep track of the states (as positions in the table) ...
+        self.trajectory = Trajectory(self.table.q.shape, first_visit=first_visit)
+        self.episodes = 0
+
+        # dict views of the policy, q function and returns (count and mean for each state-action pair)
+        self.policy_func = self.table.policy_func
+        self.q_func = self.table.q_func
+        self.return_func = self.table.return_func
 
     def __repr__(self) -> str:
         return "Agent"
 
-    def _init_policy(self):
-        return self.method._init_policy(player_values=self.player_values, dealer_values=self.dealer_values, actions=self.actions)
-    
-    def _init_q_func(self):
-        return self.method._init_q_func(player_values=self.player_values, dealer_values=self.dealer_values, actions=self.actions)
+    def share_table(self, other) -> None:
+        """ Function to learn into the table of another agent (e.g. several seats training one policy) """
+        self.table = other.table
+        self.policy_func = self.table.policy_func
+        self.q_func = self.table.q_func
+        self.return_func = self.table.return_func
 
-    def make_return_func(self, this_dict) -> Dict[_state_and_action, Tuple[int, float]]:
-        """ 
-        Function to make a return function which will return the return for being in a state-action pair 
+    def _init_table(self):
+        return self.method._init_table(player_values=self.player_values, dealer_values=self.dealer_values, actions=self.actions)
 
-        Parameters
-        ----------
-        this_dict : Dict[_state_and_action, float]
-            q function
-        
-        Returns
-        -------
-        return_func : Dict[_state_and_action, Tuple(int, float)]
-            return function mapping the state to the count and how good it is to be in that state
-        """
-        return_func = {}
-        for key in this_dict.keys():
-            # initalize the count and the return for each state-action pair to zero-zero
-            return_func[key] = (0, 0)
-        return return_func
-
-    def policy(self, dealers_value, *other_players) -> str:
+    def policy(self, dealers_value, observation=None) -> str:
         """
         Override policy to save the states as well as return the action:
         agent will need to go backwards in time to update the state-action function
@@ -231,23 +280,23 @@ class Agent(Player):
         ----------
         dealers_value : int
             value of the face up card for the dealer
-        other_players : List[?]
-            hands of the other players
+        observation : TableObservation, optional
+            cards seen at the table (not part of the state yet)
 
         Returns
         -------
         _ : str
             action
         """
-        # TODO: figure out we want to encode the other players hands ...
+        # TODO: figure out how we want to encode the observation (e.g. the true count) ...
         if self.bust:
             return 'stay'
         # NOTE: figure out if I want to keep track of the busted hands as well or not ...
         # Add debugging here ...
+        table = self.table
         try:
-            action = self.policy_func[self.total, dealers_value]
-            state_w_action = (self.total, dealers_value, action)
-            self.states.append(state_w_action)
+            i = table.player_index[self.total]
+            j = table.dealer_index[dealers_value]
         except KeyError:
             print(f'{self.total, dealers_value}')
             for card in self.hand:
@@ -255,7 +304,13 @@ class Agent(Player):
 
             raise KeyError
 
-        return action
+        a = self.method.behaviour(table, i, j)
+        trajectory = self.trajectory
+        if self.method.online and len(trajectory):
+            # td methods update the previous state-action as soon as the next action is known
+            self.method.step(table, trajectory[len(trajectory) - 1], (i, j, a))
+        trajectory.append(i, j, a)
+        return table.action_names[a]
 
     def update(self, final_state_reward, j=None) -> None:
         """
@@ -272,83 +327,112 @@ class Agent(Player):
         Returns
         -------
         """
-        # TODO: This function must assign the return and update the corresponding states .--- not sold that 
-        # a separate variable is needed for the returns but idk what else to do ...
-        self.states.reverse()
-        
-        # initialize the round return as the terminal state reward (win +1, push 0 or loss -1)
-        round_return = 0
-
-        # # trade off between policy improvement and evaluation ...
-        # if j % 2 == 0:
-        #     update_func = self.method.policy_improvement
-        # else:
-        #     update_func = self.method.policy_evaluation
-
-        # this will be looping backward since the states have been reversed and starts at the state before the terminal state
-        for i, rstate in enumerate(self.states, start=1):
-            if i == 1:
-                # reward from the terminal state ...(win +1, push 0 or loss -1)
-                round_return += final_state_reward
-            else:
-                round_return += self.return_func[rstate][1]  # no discounting ...
-
-            if rstate not in self.states[i:]:
-                # update q_function (and returns) by evaluating the policy
-                self.q_func, self.return_func = self.method.policy_evaluation(rstate, round_return, self.q_func, self.return_func)
-                # update the policy by making it greedy wrt to the q_func
-                self.policy_func = self.method.policy_improvement(rstate, self.actions, self.policy_func, self.q_func)
+        if self.method.online:
+            # only the last state-action is left to update
+            if len(self.trajectory):
+                self.method.terminal(self.table, self.trajectory[len(self.trajectory) - 1], final_state_reward)
+            self.trajectory.reset()
+            self.episodes += 1
+            return
+
+        # this walks backward from the state before the terminal state, the return is the terminal state reward
+        # (win +1, push 0 or loss -1) since there is no reward before the end of the round
+        for player, dealer, action, round_return in self.trajectory.backward(final_state_reward):
+            # update q_function (and returns) by evaluating the policy
+            self.method.evaluate(self.table, (player, dealer, action), round_return)
+            # update the policy by making it greedy wrt to the q_func
+            self.method.improve(self.table, (player, dealer))
 
         # clear the states before returning to the next round
-        self.states = []
+        self.trajectory.reset()
+        self.episodes += 1
         return
 
+    def learn_offline(self, batches, discount:float = 1.0) -> None:
+        """
+        Function to learn from logged episodes instead of playing rounds (see recording.py), the rl method needs a
+        `learn_offline` (e.g. MCExploringStarts)
+
+        Parameters
+        ----------
+        batches : Iterable[Dict[str, np.ndarray]]
+            batches of whole episodes (e.g. recording.read_batches)
+        discount : float
+            discount per step
+        """
+        self.episodes += self.method.learn_offline(self.table, batches, first_visit=self.trajectory.first_visit,
+                                                   discount=discount)
+
     def end_round(self, final_reward, j=None) -> None:
         # update using the rl algorithm
-        self.update(final_reward, j)
+        if self.stats is None:
+            self.update(final_reward, j)
+        else:
+            start = perf_counter()
+            self.update(final_reward, j)
+            self.stats.add('update', start)
         # discard cards
         super().end_round()
         return
 
-    def save(self, out_path=os.getcwd(), indent=4) -> None:
+    def save(self, out_path=os.getcwd(), indent=4, export_json=False, episodes=None) -> None:
         """
-        Function to save the results of an agent
+        Function to save the results of an agent to a binary checkpoint (agent.ckpt, see checkpoint.py)
 
         Parameters
         ----------
         out_path : str, default=os.getcwd()
             output path for the files
         indent : int
-            indent for json file
+            indent for json files
+        export_json : bool, default=False
+            whether to also write the policy and q function to policy.json and q_func.json for inspection
+        episodes : int, optional
+            episodes to record in the checkpoint, defaults to the episodes of this agent (pass the total when several
+            seats share the table)
 
         Returns
         -------
         """
-        with open(osp.join(out_path, 'policy.json'), 'w') as fp:
-            json.dump(self.policy_func, fp, indent=indent)
+        # imported here so numpy is only loaded when needed
+        from .checkpoint import save_table
+
+        episodes = self.episodes if episodes is None else episodes
+        save_table(osp.join(out_path, 'agent.ckpt'), self.table, episodes=episodes, method=type(self.method).__name__)
 
-        with open(osp.join(out_path, 'q_func.json'), 'w') as fp:
-            json.dump(self.q_func, fp, indent=indent)
+        if export_json:
+            exported = self.table.export()
+            with open(osp.join(out_path, 'policy.json'), 'w') as fp:
+                json.dump(exported['policy'], fp, indent=indent)
+
+            with open(osp.join(out_path, 'q_func.json'), 'w') as fp:
+                json.dump(exported['q_func'], fp, indent=indent)
 
         return
 
-    def load(self, in_path=os.getcwd()) -> None:
+    def load(self, in_path=os.getcwd(), mmap=False) -> None:
         """
-        Function to load an agent q function and policy
+        Function to load an agent q function, counts and policy
 
         Parameters
         ----------
         in_path : str, default=os.getcwd()
-            input path for the policy.json and q_func.json files
+            input path for the agent.ckpt file
+        mmap : bool, default=False
+            whether to memory map the checkpoint read only --- for evaluation, the agent can not learn afterwards
 
         Returns
         -------
         """
+        from .checkpoint import load_table
 
-        with open(osp.join(in_path, 'policy.json'), 'r') as fp:
-            self.policy_func = json.load(fp)
+        table, meta = load_table(osp.join(in_path, 'agent.ckpt'), mmap=mmap)
+        # same shape is not enough, the axes have to hold the same values in the same order
+        if (table.q.shape != self.table.q.shape or table.actions != self.table.actions
+                or table.player_values != self.table.player_values or table.dealer_values != self.table.dealer_values):
+            raise ValueError(f"Checkpoint with player values {table.player_values}, dealer values "
+                             f"{table.dealer_values} and actions {table.actions} does not match this agent")
 
-        with open(osp.join(in_path, 'q_func.json'), 'w') as fp:
-            self.q_func = json.load(fp)
-        
+        self.table.q, self.table.counts, self.table.policy = table.q, table.counts, table.policy
+        self.episodes = meta.get('episodes', 0)
         return 
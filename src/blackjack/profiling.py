@@ -0,0 +1,70 @@
+"""
+Optional instrumentation for the game --- cumulative time and calls per phase of a round, cards dealt and reshuffles
+
+The round loop only times a phase when the table has stats:
+
+    stats = dealer.stats
+    if stats is not None:
+        start = perf_counter()
+
+so instrumentation costs one attribute lookup per phase when it is off. Phases can be nested (e.g. `policy` inside
+`single_hand_one_player` inside `play_round`, `update` inside `cleanup_round`).
+"""
+import json
+from collections import defaultdict
+from time import perf_counter
+from typing import Dict
+
+
+class PhaseStats(object):
+    """
+    Class to accumulate timings and counters for a table
+
+    Attributes
+    ----------
+    seconds : Dict[str, float]
+        cumulative time spent in each phase
+    calls : Dict[str, int]
+        number of times each phase ran
+    cards_dealt : int
+        number of cards dealt
+    reshuffles : int
+        number of times the shoe was reset
+    """
+    def __init__(self):
+        self.reset()
+
+    def __repr__(self) -> str:
+        return f"PhaseStats({dict(self.seconds)})"
+
+    def reset(self) -> None:
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.cards_dealt = 0
+        self.reshuffles = 0
+
+    def add(self, phase:str, start:float) -> None:
+        """
+        Function to add the time since start to a phase
+
+        Parameters
+        ----------
+        phase : str
+            name of the phase
+        start : float
+            `perf_counter()` when the phase started
+        """
+        self.seconds[phase] += perf_counter() - start
+        self.calls[phase] += 1
+
+    def snapshot(self) -> Dict:
+        """ Function to get a copy of the stats as a json friendly dict """
+        return {
+            'phases': {phase: {'seconds': seconds, 'calls': self.calls[phase]} for phase, seconds in self.seconds.items()},
+            'cards_dealt': self.cards_dealt,
+            'reshuffles': self.reshuffles,
+        }
+
+    def dump(self, fp) -> None:
+        """ Function to write a snapshot as a line of json (e.g. periodically to a log file) """
+        fp.write(json.dumps(self.snapshot()) + '\n')
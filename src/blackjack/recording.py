@@ -0,0 +1,178 @@
+"""
+Append-only binary log of recorded episodes --- experience is stored once and replayed for many analyses
+
+A log is a file of chunks:
+
+    magic (8 bytes) | chunk | chunk | ...
+
+and every chunk is columnar:
+
+    steps (uint32) | episodes (uint32) | lengths (uint16 * episodes) | rewards (int8 * episodes) |
+    player totals (uint8 * steps) | dealer values (uint8 * steps) | actions (uint8 * steps)
+
+Steps are buffered in memory and written a chunk at a time (3 bytes per step and 3 bytes per episode). The writer
+has no dependencies, the reader memory maps the file and yields numpy arrays one chunk at a time.
+"""
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterator
+
+MAGIC = b'BJTRAJ01'
+_CHUNK_HEADER = struct.Struct('<II')
+
+# action codes (same as Agent.actions)
+ACTIONS = {
+    'stay': 0,
+    'hit': 1,
+}
+
+
+class TrajectoryRecorder(object):
+    """
+    Class to record the steps and rewards of episodes to a log
+
+    Set it as the `recorder` of a player (one recorder per player) and every decision made with a hand that has not
+    busted is recorded by `RoundKernel.play`, the reward is recorded by `RoundKernel.settle` (see round.py)
+
+    Attributes
+    ----------
+    path : str
+        log file --- appended to if it already exists
+    chunk_size : int
+        number of steps buffered before a chunk is written
+    episodes : int
+        number of episodes recorded
+    """
+    def __init__(self, path:str, chunk_size:int = 1 << 16):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.episodes = 0
+
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            with open(path, 'rb') as fp:
+                if fp.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"{path} is not a trajectory log")
+        self._fp = open(path, 'ab')
+        if new:
+            self._fp.write(MAGIC)
+
+        self._players = bytearray()
+        self._dealers = bytearray()
+        self._actions = bytearray()
+        self._lengths = array('H')
+        self._rewards = array('b')
+        self._length = 0  # steps in the current episode
+
+    def __repr__(self) -> str:
+        return f"TrajectoryRecorder({self.path!r}, episodes={self.episodes})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def step(self, player_total:int, dealers_value:int, action:str) -> None:
+        """
+        Function to record a decision
+
+        Parameters
+        ----------
+        player_total : int
+            the players total
+        dealers_value : int
+            value of the face up card for the dealer
+        action : str
+            the chosen action (see ACTIONS)
+        """
+        self._players.append(player_total)
+        self._dealers.append(dealers_value)
+        self._actions.append(ACTIONS[action])
+        self._length += 1
+
+    def end_episode(self, reward:int) -> None:
+        """ Function to close the current episode with its final reward (1 win, 0 push and -1 loss) """
+        self._lengths.append(self._length)
+        self._rewards.append(reward)
+        self._length = 0
+        self.episodes += 1
+        if len(self._players) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """ Function to write the finished episodes as a chunk (the current episode stays buffered) """
+        if not self._lengths:
+            return
+        steps = len(self._players) - self._length
+        lengths = self._lengths
+        if sys.byteorder == 'big':
+            lengths = array('H', lengths)
+            lengths.byteswap()
+
+        self._fp.write(_CHUNK_HEADER.pack(steps, len(self._lengths)))
+        self._fp.write(lengths.tobytes())
+        self._fp.write(self._rewards.tobytes())
+        for column in (self._players, self._dealers, self._actions):
+            self._fp.write(column[:steps])
+            del column[:steps]
+        self._fp.flush()
+
+        self._lengths = array('H')
+        self._rewards = array('b')
+
+    def close(self) -> None:
+        """ Function to write the remaining episodes and close the log """
+        if not self._fp.closed:
+            self.flush()
+            self._fp.close()
+
+
+def read_batches(path:str) -> Iterator[Dict]:
+    """
+    Function to read a log one chunk at a time
+
+    Parameters
+    ----------
+    path : str
+        log file written by TrajectoryRecorder
+
+    Yields
+    ------
+    batch : Dict[str, np.ndarray]
+        for every step in the chunk --- player (total), dealer (face up card value), action (code, see ACTIONS),
+        episode (index in the log) and reward (the final reward of its episode)
+    """
+    import numpy as np
+
+    if os.path.getsize(path) <= len(MAGIC):
+        return
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a trajectory log")
+
+    offset = len(MAGIC)
+    first_episode = 0
+    while offset < len(data):
+        steps, episodes = _CHUNK_HEADER.unpack(bytes(data[offset:offset + _CHUNK_HEADER.size]))
+        offset += _CHUNK_HEADER.size
+        lengths = np.ndarray((episodes,), dtype='<u2', buffer=data, offset=offset)
+        offset += 2 * episodes
+        rewards = data[offset:offset + episodes].view(np.int8)
+        offset += episodes
+        columns = []
+        for _ in range(3):
+            columns.append(data[offset:offset + steps])
+            offset += steps
+
+        episode = np.repeat(np.arange(first_episode, first_episode + episodes), lengths)
+        yield {
+            'player': columns[0],
+            'dealer': columns[1],
+            'action': columns[2],
+            'episode': episode,
+            'reward': np.repeat(rewards, lengths),
+        }
+        first_episode += episodes
@@ -1,4 +1,7 @@
+from time import perf_counter
 from typing import Tuple, List
+
+from .events import ACTION
 """
 Class to hold play a round of a blackjack ... this object will essentially be a namespace as it provides
 functionality to play a round however a round of blackjack only exists with a game
@@ -25,13 +28,20 @@ def start_round(dealer, players) -> None:
     players : List[Player]
         The players for this round    
     """
+    stats = dealer.stats
+    if stats is not None:
+        start = perf_counter()
+
     for player in players:
         dealer.deal_card(player)
 
     dealer.deal_card(dealer)
+
+    if stats is not None:
+        stats.add('start_round', start)
     return 
 
-def single_hand_one_player(dealer, player, other_players=[]) -> None:
+def single_hand_one_player(dealer, player, observation=None) -> None:
     """ 
     Function to play out a single player's hand against the dealer 
     
@@ -41,22 +51,34 @@ def single_hand_one_player(dealer, player, other_players=[]) -> None:
         The dealer for this round
     player : Player
         The current player who is selecting an action
-    other_players : List[Player]  # NOTE: Think about this!!! What should be passed here
-        The other players in the current round  
+    observation : TableObservation, optional
+        The cards seen at the table (shared by every seat, kept up to date by the dealer)
     """
     dealers_card = dealer.hand[1].value
     # NOTE: the policy maps the state to the action, based on the current players hand, the dealers card 
     # and possibly the other face up cards as well 
-    action = player.policy(dealers_card, *other_players)
-    print(f"--Dealers Value: {dealers_card}\n--Players Total: {player.total}")
+    stats = dealer.stats
+    if stats is None:
+        action = player.policy(dealers_card, observation)
+    else:
+        start = perf_counter()
+        action = player.policy(dealers_card, observation)
+        stats.add('policy', start)
+
+    events = dealer.events
+    if events.level >= ACTION:
+        events.emit('decision', player=player, dealers_value=dealers_card, total=player.total, action=action)
+
+    recorder = player.recorder
+    if recorder is not None and not player.bust:
+        recorder.step(player.total, dealers_card, action)
 
     if action == 'stay':
         return 
     else:
         # the player has hit
-        print('\tDealing another card to them')
         dealer.deal_card(player)
-        single_hand_one_player(dealer, player, other_players)
+        single_hand_one_player(dealer, player, observation)
 
 # TODO: figure out how to generalize this ... reward technical needs to be called for every state ...
 # NOTE: this is essentially the return signal
@@ -74,9 +96,12 @@ def calc_winner(dealer_score, player_score) -> int:
     Returns
     -------
     result : int
-        whether the _player_ won --- 1, 0 is push and -1 is loss
+        whether the _player_ won --- 1, 0 is push and -1 is loss (a player that busts loses, even if the dealer
+        busts as well)
     """
-    if player_score > dealer_score:
+    if player_score > 21:
+        return -1
+    elif dealer_score > 21 or player_score > dealer_score:
         return 1
     elif player_score == dealer_score:
         return 0
@@ -99,17 +124,35 @@ def play_round(dealer, players) -> Tuple[List[int], List[bool]]:
         Tuple containing the scores (first element) and which players busted (second element) --- 
         in both lists, the dealer comes first
     """
-    # dealers second card is face up
+    events = dealer.events
+    stats = dealer.stats
+    if stats is not None:
+        round_start = perf_counter()
+
+    # dealers second card is face up, every seat sees the same observation of the table
+    observation = dealer.observation
     for i, player in enumerate(players):
-        # grab the other players so the policy can be based on all cards in play ...
-        other_players = [player for j, player in enumerate(players) if  j != i]
-        print(f"Dealing player {i} ...")
-        single_hand_one_player(dealer, player, other_players)
+        if events.level >= ACTION:
+            events.emit('turn', seat=i, player=player)
+        if stats is None:
+            single_hand_one_player(dealer, player, observation)
+        else:
+            start = perf_counter()
+            single_hand_one_player(dealer, player, observation)
+            stats.add('single_hand_one_player', start)
 
-    # dealer finishes his hand
-    print("Dealer finishing the round")
+    # dealer turns over the hole card and finishes his hand
+    observation.see(dealer.hand[0])
+    if events.level >= ACTION:
+        events.emit('dealer_turn')
     # FIXME: beware this makes for some odd printout ... since both the player and the dealer are the same ...
-    single_hand_one_player(dealer, dealer)
+    if stats is None:
+        single_hand_one_player(dealer, dealer)
+    else:
+        start = perf_counter()
+        single_hand_one_player(dealer, dealer)
+        stats.add('dealer_play', start)
+        stats.add('play_round', round_start)
 
     return
 
@@ -131,14 +174,185 @@ def cleanup_round(dealer, players) -> Tuple[List[int], List[bool]]:
     busted : List[bool]
         whether the player busted (dealer comes first)
     """
+    stats = dealer.stats
+    if stats is not None:
+        start = perf_counter()
+
     scores = [dealer.hand.total] + [None] * len(players)
     busted = [dealer.hand.bust] + [None] * len(players)
     for i, player in enumerate(players, start=1):
         scores[i] = player.hand.total
         busted[i] = player.hand.bust
         result = calc_winner(dealer.hand.total, player.hand.total)
+        if player.recorder is not None:
+            player.recorder.end_episode(result)
         player.end_round(result)
 
     dealer.end_round()
-        
+
+    if stats is not None:
+        stats.add('cleanup_round', start)
     return scores, busted
+
+class RoundKernel(object):
+    """
+    Class to play rounds at one table iteratively --- same rules, hooks and dealing order as
+    `start_round` / `play_round` / `cleanup_round` without the recursion, the `double_func` wrapper or new lists
+
+    The dealer does not play out his hand when every seat has busted (every seat loses either way). The scores,
+    busted and results lists are reused every round, copy them to keep them past the next round.
+
+    Attributes
+    ----------
+    dealer : Dealer
+        the dealer of the table
+    players : List[Player]
+        the seats at the table
+    scores : List[int]
+        final totals of the last round (dealer first)
+    busted : List[bool]
+        whether each hand of the last round busted (dealer first)
+    results : List[int]
+        `calc_winner` for each seat in the last round
+    """
+    def __init__(self, dealer, players):
+        self.dealer = dealer
+        self.players = players
+        self.scores = [0] * (len(players) + 1)
+        self.busted = [False] * (len(players) + 1)
+        self.results = [0] * len(players)
+
+    def __repr__(self) -> str:
+        return f"RoundKernel({len(self.players)} seats)"
+
+    def deal(self) -> None:
+        """ Function to deal two cards to everyone, one at a time with the dealer last """
+        dealer, players = self.dealer, self.players
+        stats = dealer.stats
+        if stats is not None:
+            start = perf_counter()
+
+        deal_card = dealer.deal_card
+        for _ in range(2):
+            for player in players:
+                deal_card(player)
+            deal_card(dealer)
+
+        if stats is not None:
+            stats.add('start_round', start)
+
+    def _play_hand(self, player, dealers_card, observation) -> None:
+        """ Function to let one hand hit until it stays (see single_hand_one_player) """
+        dealer = self.dealer
+        events, stats, recorder = dealer.events, dealer.stats, player.recorder
+        while True:
+            if stats is None:
+                action = player.policy(dealers_card, observation)
+            else:
+                start = perf_counter()
+                action = player.policy(dealers_card, observation)
+                stats.add('policy', start)
+
+            if events.level >= ACTION:
+                events.emit('decision', player=player, dealers_value=dealers_card, total=player.total, action=action)
+            if recorder is not None and not player.bust:
+                recorder.step(player.total, dealers_card, action)
+
+            if action == 'stay':
+                return
+            dealer.deal_card(player)
+
+    def play(self) -> None:
+        """ Function to play every seat in order and then the dealer (see play_round) """
+        dealer, events, stats = self.dealer, self.dealer.events, self.dealer.stats
+        if stats is not None:
+            round_start = perf_counter()
+
+        dealers_card = dealer.hand[1].value
+        observation = dealer.observation
+        live = False
+        for i, player in enumerate(self.players):
+            if events.level >= ACTION:
+                events.emit('turn', seat=i, player=player)
+            if stats is None:
+                self._play_hand(player, dealers_card, observation)
+            else:
+                start = perf_counter()
+                self._play_hand(player, dealers_card, observation)
+                stats.add('single_hand_one_player', start)
+            live = live or not player.bust
+
+        self.finish(live)
+        if stats is not None:
+            stats.add('play_round', round_start)
+
+    def finish(self, live:bool = True) -> None:
+        """
+        Function to turn over the dealer's hole card and let the dealer play
+
+        Parameters
+        ----------
+        live : bool
+            whether any seat has not busted --- the dealer only plays when there is someone to beat
+        """
+        dealer, events, stats = self.dealer, self.dealer.events, self.dealer.stats
+        dealers_card = dealer.hand[1].value
+        dealer.observation.see(dealer.hand[0])
+        if not live:
+            # every seat busted, nothing left for the dealer to play for
+            return
+
+        if events.level >= ACTION:
+            events.emit('dealer_turn')
+        if stats is not None:
+            start = perf_counter()
+        while dealer.policy(dealers_card) == 'hit':
+            if events.level >= ACTION:
+                events.emit('decision', player=dealer, dealers_value=dealers_card, total=dealer.total, action='hit')
+            dealer.deal_card(dealer)
+        if events.level >= ACTION:
+            events.emit('decision', player=dealer, dealers_value=dealers_card, total=dealer.total, action='stay')
+        if stats is not None:
+            stats.add('dealer_play', start)
+
+    def settle(self) -> Tuple[List[int], List[bool], List[int]]:
+        """
+        Function to fill in the scores and results and end the round for everyone (see cleanup_round)
+
+        Returns
+        -------
+        scores : List[int]
+            scores for the dealer and the players
+        busted : List[bool]
+            whether the player busted (dealer comes first)
+        results : List[int]
+            1 win, 0 push or -1 loss for each player
+        """
+        dealer = self.dealer
+        stats = dealer.stats
+        if stats is not None:
+            start = perf_counter()
+
+        scores, busted, results = self.scores, self.busted, self.results
+        dealer_score = scores[0] = dealer.hand.total
+        busted[0] = dealer_score > 21
+        for i, player in enumerate(self.players):
+            score = scores[i + 1] = player.hand.total
+            busted[i + 1] = score > 21
+            result = results[i] = calc_winner(dealer_score, score)
+            if player.recorder is not None:
+                player.recorder.end_episode(result)
+            player.end_round(result)
+
+        dealer.end_round()
+
+        if stats is not None:
+            stats.add('cleanup_round', start)
+        return scores, busted, results
+
+    def run(self) -> Tuple[List[int], List[bool], List[int]]:
+        """ Function to play a whole round (see settle for the returns) """
+        self.dealer.prepare_shoe()
+        self.deal()
+        self.play()
+        return self.settle()
@@ -0,0 +1,343 @@
+"""
+asyncio server hosting many blackjack tables over a local TCP or unix socket
+
+Every connection is one human seat. Messages are lines of json in both directions:
+
+    client -> server
+        {"op": "join", "agents": 2}          start a new table with 2 agent seats (default 0)
+        {"op": "join", "table": 3}           join an existing table (seated from its next round)
+        {"op": "action", "action": "hit", "decision": 7}
+                                             answer a decision (hit or stay) --- actions for another decision are dropped
+        {"op": "leave"}                      leave the table (closing the connection works too)
+
+    server -> client
+        {"event": "joined", "table": 3, "seat": 0}
+        {"event": "decision", "decision": 7, "round": 0, "total": 14, "soft": false, "cards": ["9", "5"], "dealer": 10}
+        {"event": "result", "round": 0, "result": -1, "total": 24, "dealer": 20, "scores": [20, 24, 17]}
+        {"event": "error", "message": "..."}
+
+Each table runs in its own task and awaits the action of the human whose turn it is, so an idle human only holds up
+its own table (and stays after `action_timeout` seconds). Agent seats play inline with the same `RoundKernel` as
+`Game.play`.
+
+    python -m blackjack.server --port 8765
+"""
+import argparse
+import asyncio
+import itertools
+import json
+from typing import Callable, Dict, Optional
+
+from .players import Dealer, Player
+from .round import RoundKernel
+
+ACTIONS = ('hit', 'stay')
+
+# seats at a table (humans and agents)
+MAX_SEATS = 7
+
+
+class RemoteSeat(Player):
+    """
+    Class for a human seat played over a connection --- actions arrive on a queue instead of `policy`
+
+    Attributes
+    ----------
+    writer : asyncio.StreamWriter
+        the connection to the client
+    pending : asyncio.Queue
+        (decision, action) pairs sent by the client
+    decision : int
+        id of the last decision the client was asked for
+    connected : bool
+        whether the client is still connected
+    """
+    def __init__(self, writer):
+        super().__init__()
+        self.writer = writer
+        self.pending = asyncio.Queue()
+        self.decision = -1
+        self.connected = True
+
+    def __repr__(self) -> str:
+        return "RemoteSeat"
+
+    async def send(self, message:Dict) -> None:
+        """ Function to send a message to the client (dropped once the client is gone) """
+        if not self.connected:
+            return
+        try:
+            self.writer.write((json.dumps(message) + '\n').encode())
+            await self.writer.drain()
+        except (ConnectionError, RuntimeError):
+            self.connected = False
+
+    def new_decision(self) -> int:
+        """ Function to start a new decision --- actions left over from earlier decisions are dropped """
+        while not self.pending.empty():
+            self.pending.get_nowait()
+        self.decision += 1
+        return self.decision
+
+    async def next_action(self, timeout:float) -> str:
+        """ Function to wait for the client's action --- stay when the client is gone or too slow """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.connected:
+            try:
+                decision, action = await asyncio.wait_for(self.pending.get(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                break
+            # a late answer to a decision that already timed out is not an answer to this one
+            if decision is None or decision == self.decision:
+                return action
+        return 'stay'
+
+
+class AsyncTable(object):
+    """
+    Class for one table of the server --- plays rounds while at least one human is seated
+
+    Attributes
+    ----------
+    table_id : int
+        id of the table
+    dealer : Dealer
+        the dealer of the table
+    players : List[Player]
+        seats in play order (humans and agents)
+    rounds : int
+        number of rounds played
+    """
+    def __init__(self, table_id:int, action_timeout:float = 30., **kwargs):
+        self.table_id = table_id
+        self.action_timeout = action_timeout
+        self.dealer = Dealer(**kwargs)
+        self.players = []
+        self.rounds = 0
+        self._joining = []
+
+    def __repr__(self) -> str:
+        return f"AsyncTable({self.table_id}, {len(self.players)} seats)"
+
+    @property
+    def humans(self):
+        return [player for player in self.players + self._joining if isinstance(player, RemoteSeat) and player.connected]
+
+    @property
+    def full(self) -> bool:
+        return len(self.players) + len(self._joining) >= MAX_SEATS
+
+    def seat(self, player) -> int:
+        """ Function to add a seat from the next round on, returns the seat number """
+        if self.full:
+            raise ValueError(f"table {self.table_id} is full ({MAX_SEATS} seats)")
+        self._joining.append(player)
+        return len(self.players) + len(self._joining) - 1
+
+    async def _play_remote(self, seat:RemoteSeat, dealers_card:int) -> None:
+        """ Function to ask a human for actions until it stays or busts """
+        while not seat.bust:
+            await seat.send({'event': 'decision', 'decision': seat.new_decision(), 'round': self.rounds, 'total': seat.total, 'soft': seat.is_soft,
+                             'cards': [card.label for card in seat.hand], 'dealer': dealers_card})
+            action = await seat.next_action(self.action_timeout)
+            if action not in ACTIONS:
+                await seat.send({'event': 'error', 'message': f"action must be one of {', '.join(ACTIONS)}"})
+                continue
+            if action == 'stay':
+                return
+            self.dealer.deal_card(seat)
+
+    async def play_round(self) -> None:
+        """ Function to play one round --- the same steps as RoundKernel.run with awaits for the humans """
+        dealer = self.dealer
+        kernel = self.kernel
+        dealer.prepare_shoe()
+        kernel.deal()
+
+        dealers_card = dealer.hand[1].value
+        live = False
+        for player in self.players:
+            if isinstance(player, RemoteSeat):
+                await self._play_remote(player, dealers_card)
+            else:
+                kernel._play_hand(player, dealers_card, dealer.observation)
+            live = live or not player.bust
+        kernel.finish(live)
+
+        scores, busted, results = kernel.settle()
+        for i, player in enumerate(self.players):
+            if isinstance(player, RemoteSeat):
+                await player.send({'event': 'result', 'round': self.rounds, 'result': results[i],
+                                   'total': scores[i + 1], 'dealer': scores[0], 'scores': list(scores)})
+        self.rounds += 1
+
+    async def run(self) -> None:
+        """ Function to play rounds until every human has left """
+        while self.humans:
+            # seats only change between rounds
+            players = [player for player in self.players + self._joining
+                       if not isinstance(player, RemoteSeat) or player.connected]
+            if self._joining or len(players) != len(self.players):
+                self.players = players
+                self.kernel = RoundKernel(self.dealer, self.players)
+            self._joining = []
+            await self.play_round()
+            # let the other tables and connections run
+            await asyncio.sleep(0)
+
+
+class TableServer(object):
+    """
+    Class for a server hosting many tables
+
+    Attributes
+    ----------
+    tables : Dict[int, AsyncTable]
+        open tables by id
+    action_timeout : float
+        seconds a human has to act before staying
+    max_agents : int
+        most agent seats a client can open a table with (at most MAX_SEATS - 1, the client takes a seat too)
+    agent_factory : Callable[[], Player]
+        makes the agent seats (an `Agent` learning with MCExploringStarts by default)
+    deck_kwargs : Dict
+        keyword arguments for the Deck of every table (repeats, penetration, ...)
+    """
+    def __init__(self, action_timeout:float = 30., agent_factory:Optional[Callable[[], Player]] = None,
+                 max_agents:int = MAX_SEATS - 1, **kwargs):
+        self.tables = {}
+        self.action_timeout = action_timeout
+        self.max_agents = max(0, min(max_agents, MAX_SEATS - 1))
+        self.agent_factory = agent_factory
+        self.deck_kwargs = kwargs
+        self._ids = itertools.count()
+        self._tasks = set()
+
+    def __repr__(self) -> str:
+        return f"TableServer({len(self.tables)} tables)"
+
+    def _make_agent(self) -> Player:
+        if self.agent_factory is None:
+            # imported here so a server without agents does not need numpy
+            from .methods import MCExploringStarts
+            from .players import Agent
+            self.agent_factory = lambda: Agent(MCExploringStarts)
+        return self.agent_factory()
+
+    def open_table(self, agents:int = 0) -> AsyncTable:
+        """ Function to open a new table with some agent seats and start playing it """
+        table = AsyncTable(next(self._ids), self.action_timeout, **self.deck_kwargs)
+        for _ in range(agents):
+            table.seat(self._make_agent())
+        self.tables[table.table_id] = table
+        return table
+
+    def _start(self, table:AsyncTable) -> None:
+        async def run():
+            try:
+                await table.run()
+            finally:
+                self.tables.pop(table.table_id, None)
+
+        task = asyncio.ensure_future(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def handle(self, reader, writer) -> None:
+        """ Function to run one client session (one human seat) """
+        seat = RemoteSeat(writer)
+        table = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    op = message['op']
+                except (ValueError, KeyError, TypeError):
+                    await seat.send({'event': 'error', 'message': "expected a json object with an op"})
+                    continue
+
+                if op == 'join':
+                    if table is not None:
+                        await seat.send({'event': 'error', 'message': "already seated"})
+                        continue
+                    if 'table' in message:
+                        table_id = message['table']
+                        table = self.tables.get(table_id) if isinstance(table_id, int) else None
+                        if table is None or table.full:
+                            error = f"no table {table_id}" if table is None else f"table {table_id} is full"
+                            await seat.send({'event': 'error', 'message': error})
+                            table = None
+                            continue
+                        number = table.seat(seat)
+                    else:
+                        agents = message.get('agents', 0)
+                        if (not isinstance(agents, int) or isinstance(agents, bool) or agents < 0
+                                or agents > self.max_agents):
+                            await seat.send({'event': 'error',
+                                             'message': f"agents must be an integer from 0 to {self.max_agents}"})
+                            continue
+                        table = self.open_table(agents)
+                        number = table.seat(seat)
+                        self._start(table)
+                    await seat.send({'event': 'joined', 'table': table.table_id, 'seat': number})
+                elif op == 'action':
+                    decision = message.get('decision')
+                    seat.pending.put_nowait((decision if isinstance(decision, int) else None, message.get('action')))
+                elif op == 'leave':
+                    break
+                else:
+                    await seat.send({'event': 'error', 'message': f"unknown op {op}"})
+        finally:
+            seat.connected = False
+            # wake up a table waiting on this seat
+            seat.pending.put_nowait((None, 'stay'))
+            writer.close()
+
+    async def start(self, host:str = '127.0.0.1', port:int = 0, path:Optional[str] = None):
+        """
+        Function to start listening
+
+        Parameters
+        ----------
+        host : str
+            address to listen on (TCP)
+        port : int
+            port to listen on (0 picks a free port)
+        path : str, optional
+            listen on a unix socket at this path instead of TCP
+
+        Returns
+        -------
+        server : asyncio.AbstractServer
+            the listening server (see `server.sockets` for the address)
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path=path)
+        return await asyncio.start_server(self.handle, host, port)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Serve blackjack tables over a local socket")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="unix socket path (instead of TCP)")
+    parser.add_argument('--timeout', type=float, default=30., help="seconds a human has to act")
+    parser.add_argument('--decks', type=int, default=1, help="number of decks in the shoe")
+    parser.add_argument('--max-agents', type=int, default=MAX_SEATS - 1, help="most agent seats per table")
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = await TableServer(args.timeout, max_agents=args.max_agents, repeats=args.decks).start(args.host, args.port, args.unix)
+        print(f"serving on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Dynamic programming solver for the optimal hit/stay policy --- a baseline to compare learned agents against
+
+The value of staying on a total comes from the exact dealer distributions (see exact.py) and the value of hitting
+is the expectation over the next card of the value of the resulting hand, computed by recursing over hand totals
+(every card increases the hand's total counting aces as 1, so the recursion always ends). The policy and q function
+are returned in the same format as an `Agent`'s `policy_func` and `q_func`.
+"""
+from functools import lru_cache
+from math import sqrt
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+from .exact import CARD_VALUES, INFINITE_DECK, _add_card, outcome_probabilities
+from .players import Agent
+
+
+def _card_probabilities(counts) -> Tuple[float, ...]:
+    if counts is None:
+        return INFINITE_DECK
+    n = sum(counts)
+    return tuple(count / n for count in counts)
+
+
+def solve(player_values:Sequence[int] = Agent.player_values, dealer_values:Sequence[int] = Agent.dealer_values,
+          actions:Mapping[str, int] = Agent.actions, soft:bool = False,
+          counts:Optional[Tuple[int, ...]] = None) -> Tuple[Dict, Dict]:
+    """
+    Function to compute the optimal policy and exact state-action values
+
+    Parameters
+    ----------
+    player_values : Sequence[int]
+        possible values for the agents hand
+    dealer_values : Sequence[int]
+        possible values for the dealers face up card
+    actions : Dict[str, int]
+        possible actions (hit and stay)
+    soft : bool, default=False
+        whether states include a flag for a soft hand (an ace counted as 11) --- when False the values are for hard
+        hands
+    counts : Tuple[int], optional
+        number of cards of each value (2-11) in the shoe (see exact.shoe_counts) --- an infinite deck is used when
+        this is None. The dealer's up card is taken out of the shoe for the dealer's draws, otherwise the composition
+        is not depleted as the player draws.
+
+    Returns
+    -------
+    policy_func : Dict[Tuple, str]
+        optimal action for each (player value, dealer value[, soft]) state
+    q_func : Dict[Tuple, float]
+        expected reward for each (player value, dealer value[, soft], action) state-action
+    """
+    counts = None if counts is None else tuple(counts)
+    probabilities = _card_probabilities(counts)
+
+    @lru_cache(maxsize=None)
+    def stay(total, upcard):
+        # the dealer draws from the shoe without the up card (like exact.shoe_counts(exclude=[upcard]))
+        dealer_counts = counts
+        if counts is not None:
+            i = CARD_VALUES.index(upcard)
+            dealer_counts = counts[:i] + (counts[i] - 1,) + counts[i + 1:]
+        win, _, loss = outcome_probabilities(total, upcard, dealer_counts)
+        return win - loss
+
+    @lru_cache(maxsize=None)
+    def hit(total, soft_aces, upcard):
+        value = 0.
+        for card, p in zip(CARD_VALUES, probabilities):
+            new_total, new_soft_aces = _add_card(total, soft_aces, card)
+            value += p * (-1. if new_total > 21 else best(new_total, new_soft_aces, upcard))
+        return value
+
+    def best(total, soft_aces, upcard):
+        return max(stay(total, upcard), hit(total, soft_aces, upcard))
+
+    policy_func, q_func = {}, {}
+    for player_value in player_values:
+        for dealer_value in dealer_values:
+            # a soft hand needs an ace counted as 11 on top of at least another ace
+            for is_soft in ((False, True) if soft else (False,)):
+                if is_soft and player_value < 12:
+                    continue
+                state = (player_value, dealer_value, is_soft) if soft else (player_value, dealer_value)
+                values = {'stay': stay(player_value, dealer_value), 'hit': hit(player_value, int(is_soft), dealer_value)}
+                for action in actions:
+                    q_func[state + (action,)] = values[action]
+                policy_func[state] = 'stay' if values['stay'] >= values['hit'] else 'hit'
+
+    return policy_func, q_func
+
+
+def policy_error(policy_func:Mapping, reference:Mapping) -> float:
+    """
+    Function to get the fraction of states where a policy disagrees with a reference (e.g. from solve)
+
+    Parameters
+    ----------
+    policy_func : Mapping[Tuple, str]
+        policy to check (e.g. `Agent.policy_func`)
+    reference : Mapping[Tuple, str]
+        reference policy --- only the states in both policies are compared
+
+    Returns
+    -------
+    error : float
+        fraction of the shared states with a different action
+    """
+    states = [state for state in reference if state in policy_func]
+    return sum(policy_func[state] != reference[state] for state in states) / len(states)
+
+
+def q_rmse(q_func:Mapping, reference:Mapping) -> float:
+    """
+    Function to get the root mean squared error of a q function against a reference (e.g. from solve)
+
+    Parameters
+    ----------
+    q_func : Mapping[Tuple, float]
+        q function to check (e.g. `Agent.q_func`)
+    reference : Mapping[Tuple, float]
+        reference q function --- only the state-actions in both are compared
+
+    Returns
+    -------
+    rmse : float
+        root mean squared error over the shared state-actions
+    """
+    keys = [key for key in reference if key in q_func]
+    return sqrt(sum((q_func[key] - reference[key]) ** 2 for key in keys) / len(keys))
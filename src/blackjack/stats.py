@@ -0,0 +1,236 @@
+"""
+Streaming statistics --- constant memory summaries that are updated one observation (or one batch) at a time
+"""
+from math import sqrt
+
+
+class RunningMoments(object):
+    """
+    Class to track the mean and variance of a stream (Welford's algorithm, batches are merged with Chan's formula)
+
+    Attributes
+    ----------
+    count : int
+        number of observations
+    mean : float
+        mean of the observations
+    m2 : float
+        sum of squared differences from the mean
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.
+        self.m2 = 0.
+
+    def __repr__(self) -> str:
+        return f"RunningMoments(count={self.count}, mean={self.mean:.5f}, std={self.std:.5f})"
+
+    def add(self, value:float) -> None:
+        """ Function to add a single observation """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, count:int, mean:float, m2:float) -> None:
+        """
+        Function to add a batch of observations given its summary
+
+        Parameters
+        ----------
+        count : int
+            number of observations in the batch
+        mean : float
+            mean of the batch
+        m2 : float
+            sum of squared differences from the batch mean
+        """
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        """ Sample variance """
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.
+
+    @property
+    def std(self) -> float:
+        return sqrt(self.variance)
+
+    @property
+    def stderr(self) -> float:
+        """ Standard error of the mean """
+        return sqrt(self.variance / self.count) if self.count > 0 else float('inf')
+
+
+class OutcomeTracker(object):
+    """
+    Class to track the outcomes of one seat across rounds in constant memory
+
+    Keeps totals of wins, pushes, losses, busts and dealer busts, the mean and variance of the return and the rates
+    over the last `window` rounds (a ring buffer of the last results)
+
+    Attributes
+    ----------
+    wins, pushes, losses : int
+        number of rounds with each result
+    busts : int
+        number of rounds where the seat busted
+    dealer_busts : int
+        number of rounds where the dealer busted
+    returns : RunningMoments
+        mean and variance of the return per round
+    window : int
+        number of recent rounds for the windowed rates
+    """
+    def __init__(self, window:int = 1000):
+        self.wins = 0
+        self.pushes = 0
+        self.losses = 0
+        self.busts = 0
+        self.dealer_busts = 0
+        self.returns = RunningMoments()
+
+        self.window = window
+        self._recent = bytearray(window)  # last results stored as result + 1 (0 loss, 1 push, 2 win)
+        self._recent_counts = [0, 0, 0]
+        self._next = 0
+
+    def __repr__(self) -> str:
+        return f"OutcomeTracker(rounds={self.rounds}, wins={self.wins}, pushes={self.pushes}, losses={self.losses})"
+
+    @property
+    def rounds(self) -> int:
+        return self.returns.count
+
+    def add(self, result:int, busted:bool = False, dealer_busted:bool = False) -> None:
+        """
+        Function to add the outcome of a round
+
+        Parameters
+        ----------
+        result : int
+            1 win, 0 push and -1 loss (see round.calc_winner)
+        busted : bool
+            whether the seat busted
+        dealer_busted : bool
+            whether the dealer busted
+        """
+        if result > 0:
+            self.wins += 1
+        elif result == 0:
+            self.pushes += 1
+        else:
+            self.losses += 1
+        self.busts += busted
+        self.dealer_busts += dealer_busted
+        self.returns.add(result)
+
+        # replace the oldest result in the window
+        slot = self._next % self.window
+        if self._next >= self.window:
+            self._recent_counts[self._recent[slot]] -= 1
+        self._recent[slot] = result + 1
+        self._recent_counts[result + 1] += 1
+        self._next += 1
+
+    def snapshot(self) -> dict:
+        """ Function to get the current totals and rates as a json friendly dict """
+        rounds = self.rounds or 1
+        recent = min(self._next, self.window) or 1
+        losses, pushes, wins = self._recent_counts
+        return {
+            'rounds': self.rounds,
+            'wins': self.wins,
+            'pushes': self.pushes,
+            'losses': self.losses,
+            'busts': self.busts,
+            'dealer_busts': self.dealer_busts,
+            'win_rate': self.wins / rounds,
+            'push_rate': self.pushes / rounds,
+            'loss_rate': self.losses / rounds,
+            'bust_rate': self.busts / rounds,
+            'mean_return': self.returns.mean,
+            'std_return': self.returns.std,
+            'window_win_rate': wins / recent,
+            'window_push_rate': pushes / recent,
+            'window_loss_rate': losses / recent,
+        }
+
+
+class ConvergenceMonitor(object):
+    """
+    Class to decide when training has converged from the changes of the agents tables (see QTable.convergence)
+
+    Every `window` rounds the changes of the window are checked against the thresholds (None skips a threshold) and
+    training stops once they are all met for `patience` windows in a row
+
+    Attributes
+    ----------
+    window : int
+        number of rounds between checks
+    max_policy_changes : int, optional
+        most policy entries that may change in a window
+    max_q_change : float, optional
+        largest absolute change of a q value allowed in a window
+    mean_q_change : float, optional
+        largest mean absolute change per update allowed in a window
+    min_coverage : float, optional
+        smallest fraction of state-actions that must have been visited
+    patience : int
+        number of windows in a row that must meet the thresholds
+    last : Dict[str, float]
+        changes in the last window (summed over the tables, the max and coverage are the worst table)
+    """
+    def __init__(self, window:int = 10_000, max_policy_changes:int = 0, max_q_change:float = None,
+                 mean_q_change:float = None, min_coverage:float = None, patience:int = 1):
+        self.window = window
+        self.max_policy_changes = max_policy_changes
+        self.max_q_change = max_q_change
+        self.mean_q_change = mean_q_change
+        self.min_coverage = min_coverage
+        self.patience = patience
+        self.streak = 0
+        self.windows = 0
+        self.last = None
+
+    def __repr__(self) -> str:
+        return f"ConvergenceMonitor(window={self.window}, streak={self.streak}/{self.patience})"
+
+    def check(self, tables) -> bool:
+        """
+        Function to end a window and check whether training has converged
+
+        Parameters
+        ----------
+        tables : List[QTable]
+            the tables being trained
+
+        Returns
+        -------
+        converged : bool
+            whether the thresholds have been met for `patience` windows in a row
+        """
+        windows = [table.convergence() for table in tables]
+        updates = sum(window['updates'] for window in windows)
+        self.last = last = {
+            'updates': updates,
+            'policy_changes': sum(window['policy_changes'] for window in windows),
+            'max_q_change': max(window['max_q_change'] for window in windows),
+            'mean_q_change': sum(window['mean_q_change'] * window['updates'] for window in windows) / updates
+                             if updates else 0.,
+            'coverage': min(window['coverage'] for window in windows),
+        }
+        self.windows += 1
+
+        met = ((self.max_policy_changes is None or last['policy_changes'] <= self.max_policy_changes)
+               and (self.max_q_change is None or last['max_q_change'] <= self.max_q_change)
+               and (self.mean_q_change is None or last['mean_q_change'] <= self.mean_q_change)
+               and (self.min_coverage is None or last['coverage'] >= self.min_coverage))
+        self.streak = self.streak + 1 if met else 0
+        return self.streak >= self.patience
@@ -0,0 +1,185 @@
+"""
+Parallel sweeps over hyperparameters and seeds
+
+A grid maps each parameter to the values to try (every combination is a job) or is a list of configurations:
+
+    {"method": ["mc"], "init_val": [0, 5], "repeats": [1, 6], "seats": [1, 3], "seed": [0, 1, 2]}
+
+Config keys are `method` (see methods.METHODS), `repeats`, `penetration`, `seats`, `players` and `seed` --- anything else
+is passed to the rl method (e.g. init_val, alpha, epsilon). Every job trains a `GameWAgents` table in a process pool
+until its round or time budget runs out, then the metrics and the learned policy are appended as one line of json to
+the results file. Finished jobs are found in the results file and skipped, so an interrupted sweep is resumed by
+running it again --- a job is the config together with its budget (rounds, seconds and eval_hands), so running the
+same grid with another budget runs every job again. A job that raises is written as a row with an `error` instead of
+metrics and is run again on the next resume.
+"""
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+_grid = Union[Dict[str, list], List[Dict]]
+
+# rounds played between checks of the time budget
+CHUNK = 1000
+
+
+def expand_grid(grid:_grid) -> List[Dict]:
+    """
+    Function to list the configurations of a grid
+
+    Parameters
+    ----------
+    grid : Dict[str, list] or List[Dict]
+        values for each parameter (every combination is used) or the configurations themselves
+
+    Returns
+    -------
+    configs : List[Dict]
+        one dict per job
+    """
+    if isinstance(grid, dict):
+        keys = sorted(grid)
+        return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+    return [dict(config) for config in grid]
+
+
+def job_id(config:Dict, rounds:int, seconds:Optional[float] = None, eval_hands:int = 10**6) -> str:
+    """ Function to get the key of a job in the results file (the config and the budget it was run with) """
+    return json.dumps({'config': config, 'rounds': rounds, 'seconds': seconds, 'eval_hands': eval_hands},
+                      sort_keys=True)
+
+
+def read_results(path:str) -> Iterator[Dict]:
+    """ Function to read the rows of a results file (partly written rows of an interrupted sweep are skipped) """
+    if not os.path.exists(path):
+        return
+    with open(path) as fp:
+        for line in fp:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if 'id' in row:
+                yield row
+
+
+def finished_jobs(path:str) -> set:
+    """ Function to read the ids of the jobs that finished without an error in a results file """
+    return {row['id'] for row in read_results(path) if 'error' not in row}
+
+
+def run_job(config:Dict, rounds:int, seconds:Optional[float] = None, eval_hands:int = 10**6) -> Dict:
+    """
+    Function to train one configuration and measure it
+
+    Parameters
+    ----------
+    config : Dict
+        configuration of the job (see the module docstring)
+    rounds : int
+        most rounds to train for
+    seconds : float, optional
+        most seconds to train for (checked every CHUNK rounds)
+    eval_hands : int
+        most hands to evaluate the learned policy with (see evaluation.evaluate_policy), 0 skips the evaluation
+
+    Returns
+    -------
+    row : Dict
+        id, config, metrics (rounds, seconds, rounds_per_sec, mean_return and win_rate of the agents seats, coverage,
+        policy_error against the optimal policy and the ev of the learned policy) and the policy
+    """
+    from .environment import GameWAgents
+    from .events import NULL_SINK
+    from .evaluation import evaluate_policy
+    from .methods import METHODS
+    from .solver import policy_error, solve
+
+    params = dict(config)
+    rl_method = METHODS[params.pop('method', 'mc')]
+    seed = params.pop('seed', None)
+    deck_kwargs = {'repeats': params.pop('repeats', 1), 'penetration': params.pop('penetration', None)}
+    nagents, nplayers = params.pop('seats', 1), params.pop('players', 0)
+
+    random.seed(seed)
+    game = GameWAgents(rl_method, params, nagents=nagents, nplayers=nplayers, events=NULL_SINK, **deck_kwargs)
+    start = perf_counter()
+    while game.rounds_played < rounds and (seconds is None or perf_counter() - start < seconds):
+        game.nrounds = min(CHUNK, rounds - game.rounds_played)
+        game.play()
+    elapsed = perf_counter() - start
+
+    agent = game.agents[0]
+    seats = game.snapshot()['players'][nplayers:]
+    metrics = {
+        'rounds': game.rounds_played,
+        'seconds': elapsed,
+        'rounds_per_sec': game.rounds_played / elapsed if elapsed > 0 else 0.,
+        'mean_return': sum(seat['mean_return'] for seat in seats) / len(seats),
+        'win_rate': sum(seat['win_rate'] for seat in seats) / len(seats),
+        'coverage': agent.table.convergence(reset=False)['coverage'],
+        'policy_error': policy_error(agent.policy_func, solve()[0]),
+    }
+    if eval_hands:
+        evaluation = evaluate_policy(agent, ci_width=0., max_hands=eval_hands, repeats=deck_kwargs['repeats'],
+                                     seed=seed)
+        metrics['ev'], metrics['ev_ci'] = evaluation['ev'], [evaluation['ci_low'], evaluation['ci_high']]
+
+    return {'id': job_id(config, rounds, seconds, eval_hands), 'config': config, 'metrics': metrics, 'policy': agent.table.export()['policy']}
+
+
+def run_sweep(grid:_grid, out_path:str, rounds:int = 100_000, seconds:Optional[float] = None,
+              workers:Optional[int] = None, eval_hands:int = 10**6) -> Tuple[int, int]:
+    """
+    Function to run every job of a grid that is not in the results file yet
+
+    Parameters
+    ----------
+    grid : Dict[str, list] or List[Dict]
+        the configurations to run (see expand_grid)
+    out_path : str
+        results file (json lines) --- rows are appended as jobs finish
+    rounds : int
+        most rounds per job
+    seconds : float, optional
+        most seconds of training per job
+    workers : int, optional
+        number of processes (defaults to the number of cpus)
+    eval_hands : int
+        most hands to evaluate each learned policy with
+
+    Returns
+    -------
+    ran : int
+        number of jobs run (jobs already in the results file are skipped)
+    failed : int
+        number of jobs that raised (written with an `error` and run again on the next resume)
+    """
+    done = finished_jobs(out_path)
+    todo = [config for config in expand_grid(grid) if job_id(config, rounds, seconds, eval_hands) not in done]
+    if not todo:
+        return 0, 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(out_path, 'a+') as fp:
+        # start on a new line if the last run was interrupted in the middle of a row
+        if fp.tell():
+            fp.seek(fp.tell() - 1)
+            if fp.read(1) != '\n':
+                fp.write('\n')
+        futures = {pool.submit(run_job, config, rounds, seconds, eval_hands): config for config in todo}
+        failed = 0
+        for future in as_completed(futures):
+            # one bad job should not lose the rows of the others
+            try:
+                row = future.result()
+            except Exception as exc:
+                config = futures[future]
+                row = {'id': job_id(config, rounds, seconds, eval_hands), 'config': config, 'error': repr(exc)}
+                failed += 1
+            fp.write(json.dumps(row) + '\n')
+            fp.flush()
+    return len(todo), failed
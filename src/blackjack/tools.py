@@ -1,6 +1,7 @@
 import random
-from typing import List
+from typing import List, Tuple
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 
 SUITS = ('Hearts', 'Diamonds', 'Clubs', 'Spades')
 
@@ -13,7 +14,7 @@ VALUES.extend((10,10,10,11))
 class Card(object):
     # This is a fundamental object
     """
-    Card Class
+    Card Class --- cards are immutable so a single instance of each card (a flyweight) is shared by all decks
     
     Attributes
     ----------
@@ -26,11 +27,22 @@ class Card(object):
     value : int
         The number value of the card (2-10, 11 or 1)
     """
+    __slots__ = ('label', 'suit', 'value')
+
     def __init__(self, label:str, suit:str, value:int):
         super(Card, self).__init__()
-        self.label = label
-        self.suit = suit
-        self.value = value
+        object.__setattr__(self, 'label', label)
+        object.__setattr__(self, 'suit', suit)
+        object.__setattr__(self, 'value', value)
+
+    def __setattr__(self, name, value) -> None:
+        raise AttributeError(f"Cards are immutable, can not set {name}")
+
+    def __delattr__(self, name) -> None:
+        raise AttributeError(f"Cards are immutable, can not delete {name}")
+
+    def __reduce__(self):
+        return (Card, (self.label, self.suit, self.value))
 
     def __repr__(self) -> str:
         return f"{self.label} of {self.suit}"
@@ -51,6 +63,59 @@ class Card(object):
     def __radd__(self, other_card) -> int:
         return self.__add__(other_card)
 
+# a card is encoded as a single byte: label index * 4 + suit index (the rank code is code // 4)
+CARD_CODES = {(label, suit): i * len(SUITS) + j for i, label in enumerate(LABELS) for j, suit in enumerate(SUITS)}
+_FULL_DECK = bytes(range(len(CARD_CODES)))
+_FLYWEIGHTS = {}
+
+def flyweights(ace_val:int = 11) -> Tuple[Card, ...]:
+    """
+    Function to get the shared card instances, indexed by card code
+
+    Parameters
+    ----------
+    ace_val : int
+        the value of the ace (either 11 or 1)
+
+    Returns
+    -------
+    cards : Tuple[Card]
+        one card for each card code
+    """
+    cards = _FLYWEIGHTS.get(ace_val)
+    if cards is None:
+        label_to_value = dict(zip(LABELS, VALUES[:-1] + [ace_val]))
+        cards = _FLYWEIGHTS[ace_val] = tuple(Card(label, suit, label_to_value[label]) for label, suit in CARD_CODES)
+    return cards
+
+class CardView(Sequence):
+    """
+    Read only view of the cards left in a compact deck --- card codes are mapped to the shared cards on access
+    """
+    def __init__(self, faces:Tuple[Card, ...], codes:bytearray, start:int = 0):
+        self._faces = faces
+        self._codes = codes
+        self._start = start
+
+    def __len__(self) -> int:
+        return len(self._codes) - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._faces[code] for code in self._codes[self._start:][index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("card index out of range")
+        return self._faces[self._codes[self._start + index]]
+
+    def __iter__(self):
+        faces = self._faces
+        return (faces[code] for code in self._codes[self._start:])
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
 class CardStack(ABC):
     """
     Class to hold multiple cards and to allow iterating across the cards
@@ -72,7 +137,8 @@ class CardStack(ABC):
 class Hand(CardStack):
     # This represents the state
     """
-    Class for a hand of Blackjack
+    Class for a hand of Blackjack --- the total and the number of aces counted as 11 are kept up to date as cards
+    are added with `add` so reading them is O(1)
 
     Attributes
     ----------
@@ -81,6 +147,10 @@ class Hand(CardStack):
     """
     def __init__(self, *args):
         super(Hand, self).__init__(*args)
+        self._total = 0
+        self._soft_aces = 0
+        for card in self.cards:
+            self._count(card)
         self.msg += f" totaling {self.total}"
 
     def __repr__(self) -> str:
@@ -90,32 +160,49 @@ class Hand(CardStack):
             msg += "\nOver 21 ... Busted"
         return msg
 
+    def _count(self, card) -> None:
+        """ Function to add a card to the running total """
+        total = self._total + card.value
+        soft_aces = self._soft_aces + (card.value == 11 and card.label == 'Ace')
+
+        # count aces as 1 instead of 11 while over 21
+        while total > 21 and soft_aces > 0:
+            total -= 10
+            soft_aces -= 1
+
+        self._total = total
+        self._soft_aces = soft_aces
+
+    def add(self, card) -> None:
+        """ Function to add a card to the hand """
+        self.cards.append(card)
+        self._count(card)
+
+    def reset(self) -> None:
+        """ Function to empty the hand in place """
+        self.cards.clear()
+        self._total = 0
+        self._soft_aces = 0
+        self.msg = "0 cards totaling 0"
+
     @property
     def aces(self) -> List[Card]:
-        return [card for i, card in enumerate(self.cards) if card.label == 'Ace' and card.value == 11]
+        """ The aces that are still counted as 11 """
+        aces = [card for card in self.cards if card.label == 'Ace' and card.value == 11]
+        return aces[len(aces) - self._soft_aces:]
 
     @property
     def total(self) -> int:
-        total = sum(self.cards)
-        usable_aces = len(self.aces)
-
-        if total <= 21:
-            return total
-
-        elif usable_aces < 1:
-            return total
-
-        else:
-            # get index of the first ace we have in our hand
-            first_ace = self.aces[0]
-            # change the value of the ace from 11 to 1
-            first_ace.value = 1
-            # recalculate the hands total
-            return self.total
+        return self._total
+
+    @property
+    def is_soft(self) -> bool:
+        """ Whether an ace is counted as 11 """
+        return self._soft_aces > 0
             
     @property
     def bust(self) -> bool:
-        return self.total > 21
+        return self._total > 21
 
 class Deck(CardStack):
     # This represents the environment
@@ -127,6 +214,9 @@ class Deck(CardStack):
     create a standard deck (allows setting up deck with some options)
     2. Allowing to traverse over the cards using an iterator of convience
 
+    The cards are stored as a preallocated bytearray of card codes and dealt by moving a cursor, `cards` is a
+    view of the cards left in the deck
+
     Attributes
     ----------
     values : List[str]
@@ -139,7 +229,7 @@ class Deck(CardStack):
     labels = LABELS
     values = VALUES
 
-    def __init__(self, shuffle:bool = True, repeats:int = 1, ace_val:int = 11):
+    def __init__(self, shuffle:bool = True, repeats:int = 1, ace_val:int = 11, penetration:float = None):
         """
         Init function for a deck
 
@@ -151,33 +241,47 @@ class Deck(CardStack):
             the number of decks to use for the game
         ace_val : int
             the value of the ace (either 11 or 1)        
+        penetration : float, optional
+            fraction of the shoe dealt before the cut card is reached (see cut_card_reached) --- when None the cut
+            card is always reached so the shoe is reshuffled every round
         """
         # TODO: Should we allow for an infinite deck?
         # NOTE: do not pass any cards to the constructor of card stack
+        self._faces = flyweights(ace_val)
         super(Deck, self).__init__()
         self.shuffle = shuffle
         self.repeats = repeats
-        self.values[-1] = ace_val
+        self.penetration = penetration
+        self.values = self.values[:-1] + [ace_val]
 
         self.label_to_value = dict(zip(self.labels, self.values))
-        # reassign self.cards to the deck
-        self.cards = self._create_deck()
+        # reassign the cards to the deck
+        self._codes = self._create_deck()
+        self._position = 0
         self.counter=0
-        
-    def _create_deck(self) -> List[Card]:
+
+    @property
+    def cards(self) -> CardView:
+        """ View of the cards left in the deck """
+        return CardView(self._faces, self._codes, self._position)
+
+    @cards.setter
+    def cards(self, cards) -> None:
+        self._codes = bytearray(CARD_CODES[card.label, card.suit] for card in cards)
+        self._position = 0
+
+    def _create_deck(self) -> bytearray:
         """
         Function to create a Deck
 
         Returns
         -------
 
-        deck : List[Card]
-            List of cards
+        deck : bytearray
+            card codes in dealing order
         """
-        # create the number of decks
-        decks = [[Card(label, suit, self.label_to_value[label]) for label in self.labels for suit in self.suits] for i in range(self.repeats)]
-        # flatten the decks into a single full deck
-        full_deck = [card for deck in decks for card in deck]
+        # create the number of decks in one allocation
+        full_deck = bytearray(_FULL_DECK * self.repeats)
         if self.shuffle:
             random.shuffle(full_deck)
         return full_deck
@@ -185,11 +289,37 @@ class Deck(CardStack):
     def __repr__(self) -> str:
         return f"{self.repeats} Deck(s) with " + self.msg
 
+    def __len__(self) -> int:
+        return len(self._codes) - self._position
+
     def deal_card(self) -> Card:
         """ Function to deal a single card from the deck """
-        # NOTE: is this useful?
-        card = self.cards.pop(0)
-        return card
+        position = self._position
+        if position >= len(self._codes):
+            raise IndexError("No cards left in the deck")
+        self._position = position + 1
+        return self._faces[self._codes[position]]
+
+    @property
+    def cut_card_reached(self) -> bool:
+        """ Whether enough of the shoe has been dealt that it should be reshuffled before the next round """
+        return self.penetration is None or self._position >= self.penetration * len(self._codes)
+
+    def reshuffle(self, order=None) -> None:
+        """
+        Function to collect every card and shuffle the shoe in place
+
+        Parameters
+        ----------
+        order : bytes-like, optional
+            card codes in the new dealing order (e.g. a permutation generated ahead of time) --- the shoe is
+            shuffled with random.shuffle when this is None
+        """
+        if order is not None:
+            self._codes[:] = memoryview(order)
+        elif self.shuffle:
+            random.shuffle(self._codes)
+        self._position = 0
 
     def __iter__(self):
         return iter(self.cards)
@@ -204,3 +334,62 @@ class Deck(CardStack):
     #     current_card = self.__getitem__(self.counter)
     #     self.counter += 1
     #     return current_card
+
+
+# hi-lo count of each card (2-6 are +1, 7-9 are 0, 10s and aces are -1) and the position of its value (2-11)
+HI_LO = {label: 1 if value <= 6 else 0 if value <= 9 else -1 for label, value in zip(LABELS, VALUES)}
+VALUE_INDEX = {label: value - 2 for label, value in zip(LABELS, VALUES)}
+
+
+class TableObservation(object):
+    """
+    Class for what every seat can see at the table --- kept up to date by the dealer as cards are dealt, O(1) per card
+
+    Attributes
+    ----------
+    cards : List[Card]
+        face up cards dealt this round (the dealer's hole card is added when it is turned over)
+    running_count : int
+        hi-lo count of the cards seen since the shoe was shuffled
+    seen : int
+        number of cards seen since the shoe was shuffled
+    value_counts : List[int]
+        number of cards of each value (2-11, see exact.CARD_VALUES) seen since the shoe was shuffled
+    """
+    __slots__ = ('cards', 'running_count', 'seen', 'value_counts')
+
+    def __init__(self):
+        self.cards = []
+        self.running_count = 0
+        self.seen = 0
+        self.value_counts = [0] * 10
+
+    def __repr__(self) -> str:
+        return f"TableObservation({len(self.cards)} cards this round, count {self.running_count})"
+
+    def see(self, card:Card) -> None:
+        """ Function to add a face up card """
+        self.cards.append(card)
+        self.running_count += HI_LO[card.label]
+        self.seen += 1
+        self.value_counts[VALUE_INDEX[card.label]] += 1
+
+    def new_round(self) -> None:
+        """ Function to clear the cards of the round (the count carries on) """
+        self.cards.clear()
+
+    def new_shoe(self) -> None:
+        """ Function to reset the count after the shoe is shuffled """
+        self.running_count = 0
+        self.seen = 0
+        self.value_counts = [0] * 10
+
+    def true_count(self, repeats:int = 1) -> float:
+        """ Function to get the running count per deck left in a shoe of `repeats` decks """
+        decks_left = (52 * repeats - self.seen) / 52
+        return self.running_count / decks_left if decks_left > 0 else 0.
+
+    def remaining(self, repeats:int = 1) -> Tuple[int, ...]:
+        """ Function to get the number of cards of each value (2-11) left in the shoe (see exact.shoe_counts) """
+        full = [4 * repeats * VALUES[:-1].count(value) for value in range(2, 11)] + [4 * repeats]
+        return tuple(count - seen for count, seen in zip(full, self.value_counts))
@@ -0,0 +1,105 @@
+"""
+Reusable buffer for the state-actions visited in an episode
+
+Steps are stored as array positions (player value, dealer value, action code) in preallocated byte buffers. The
+first visit of every state-action is found when the step is added with a visited map that is stamped with the
+episode number, so resetting between rounds is O(1) and Monte Carlo updates need a single reverse pass.
+"""
+from array import array
+from typing import Iterator, Tuple
+
+
+class Trajectory(object):
+    """
+    Class to record the steps of an episode
+
+    Attributes
+    ----------
+    shape : Tuple[int, int, int]
+        shape of the state-action table (player values, dealer values, actions)
+    first_visit : bool
+        whether only the first visit of a state-action in an episode is used for updates
+    """
+    def __init__(self, shape:Tuple[int, int, int], first_visit:bool = True, capacity:int = 16):
+        self.shape = tuple(shape)
+        self.first_visit = first_visit
+        self._players = bytearray(capacity)
+        self._dealers = bytearray(capacity)
+        self._actions = bytearray(capacity)
+        self._first = bytearray(capacity)
+        self._length = 0
+
+        # visited map --- a state-action was visited this episode if its stamp is the current episode
+        self._visited = array('q', [0]) * (self.shape[0] * self.shape[1] * self.shape[2])
+        self._episode = 1
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __repr__(self) -> str:
+        return f"Trajectory({self._length} steps)"
+
+    def _grow(self) -> None:
+        """ Function to double the capacity of the buffers """
+        for buffer in (self._players, self._dealers, self._actions, self._first):
+            buffer.extend(bytes(len(buffer)))
+
+    def append(self, i:int, j:int, a:int) -> None:
+        """
+        Function to add a step
+
+        Parameters
+        ----------
+        i : int
+            position of the player's value
+        j : int
+            position of the dealer's value
+        a : int
+            action code
+        """
+        t = self._length
+        if t == len(self._players):
+            self._grow()
+        self._players[t] = i
+        self._dealers[t] = j
+        self._actions[t] = a
+
+        flat = (i * self.shape[1] + j) * self.shape[2] + a
+        self._first[t] = self._visited[flat] != self._episode
+        self._visited[flat] = self._episode
+        self._length = t + 1
+
+    def __getitem__(self, t:int) -> Tuple[int, int, int]:
+        if not 0 <= t < self._length:
+            raise IndexError("step index out of range")
+        return self._players[t], self._dealers[t], self._actions[t]
+
+    def backward(self, final_reward:float, discount:float = 1.0) -> Iterator[Tuple[int, int, int, float]]:
+        """
+        Function to walk the episode in reverse and compute the returns (rewards are 0 until the end of the round)
+
+        Parameters
+        ----------
+        final_reward : float
+            reward from the final state (win +1, push 0 or loss -1)
+        discount : float
+            discount per step
+
+        Yields
+        ------
+        i, j, a : int
+            position of the state-action
+        round_return : float
+            return following the state-action --- only steps that should be updated are yielded
+        """
+        round_return = final_reward
+        every_visit = not self.first_visit
+        for t in range(self._length - 1, -1, -1):
+            if every_visit or self._first[t]:
+                yield self._players[t], self._dealers[t], self._actions[t], round_return
+            round_return *= discount
+
+    def reset(self) -> None:
+        """ Function to empty the buffer for the next episode --- O(1) """
+        self._length = 0
+        self._episode += 1
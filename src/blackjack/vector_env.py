@@ -0,0 +1,155 @@
+"""
+Vector environment --- N independent single seat tables stepped with one call
+
+Each table keeps its own shoe and hands as rows of integer arrays (see batch.py). Learners see an observation array
+of (player total, dealer's face up card, soft) per table, pass back an array of action codes (`Agent.actions`, 1 hit
+and 0 stay) and get the next observations, rewards and done flags. Finished tables start their next round right
+away, so the observation of a table that is done is the first observation of its next round.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .batch import ShoeBatch, add_cards, calc_winner, dealer_policy, shuffled_shoes, _play_hands, _policy
+
+HIT = 1
+STAY = 0
+
+
+class _CyclingShoes(ShoeBatch):
+    """ Shoes that are reshuffled in place when they run out, instead of growing like ShoeBatch """
+    def reshuffle(self, rows) -> None:
+        """ Function to reshuffle the shoes of the given rows and deal them from the top """
+        self.shoes[rows] = shuffled_shoes(len(rows), self.repeats, self.rng)
+        self.cursor[rows] = 0
+
+    def deal(self, rows) -> np.ndarray:
+        empty = rows[self.cursor[rows] >= self.shoes.shape[1]]
+        if len(empty):
+            self.reshuffle(empty)
+        return super().deal(rows)
+
+
+class VectorEnv(object):
+    """
+    Class holding N independent tables with one seat each
+
+    Attributes
+    ----------
+    n : int
+        number of tables
+    penetration : float
+        fraction of a shoe dealt before it is reshuffled (checked between rounds)
+    rounds : int
+        number of finished rounds over all tables
+    """
+    def __init__(self, n:int, repeats:int = 1, penetration:float = 0.75, dealer_policy:_policy = dealer_policy,
+                 seed:Optional[int] = None):
+        self.n = n
+        self.penetration = penetration
+        self.dealer_policy = dealer_policy
+        self.shoe = _CyclingShoes(n, repeats, np.random.default_rng(seed))
+        self.cut = int(penetration * self.shoe.shoes.shape[1])
+        self.rounds = 0
+
+        self._rows = np.arange(n)
+        self.totals = np.zeros((2, n), dtype=np.int8)  # dealer first
+        self.soft = np.zeros((2, n), dtype=np.int8)
+        self.upcards = np.zeros(n, dtype=np.int8)
+
+    def __repr__(self) -> str:
+        return f"VectorEnv({self.n} tables)"
+
+    @property
+    def observations(self) -> np.ndarray:
+        """ (player total, dealer's face up card, soft) for every table with shape (n, 3) """
+        return np.stack((self.totals[1], self.upcards, self.soft[1] > 0), axis=1).astype(np.int8)
+
+    def _start(self, rows) -> None:
+        """ Function to deal a new round to the given tables """
+        used = rows[self.shoe.cursor[rows] >= self.cut]
+        if len(used):
+            self.shoe.reshuffle(used)
+
+        self.totals[:, rows] = 0
+        self.soft[:, rows] = 0
+        # deal the seat then the dealer, twice --- the dealers second card is face up
+        for _ in range(2):
+            for seat in (1, 0):
+                values = self.shoe.deal(rows)
+                add_cards(self.totals[seat], self.soft[seat], rows, values)
+        self.upcards[rows] = values
+
+    def reset(self) -> np.ndarray:
+        """
+        Function to start a new round at every table
+
+        Returns
+        -------
+        observations : np.ndarray[int8]
+            (player total, dealer's face up card, soft) for every table with shape (n, 3)
+        """
+        self._start(self._rows)
+        return self.observations
+
+    def step(self, actions) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Function to take one action at every table
+
+        Parameters
+        ----------
+        actions : np.ndarray[int]
+            action code for every table (1 hit, 0 stay)
+
+        Returns
+        -------
+        observations : np.ndarray[int8]
+            next (player total, dealer's face up card, soft) for every table --- the first observation of the next
+            round for the tables that are done
+        rewards : np.ndarray[int8]
+            1 win, 0 push and -1 loss for the tables that are done (0 otherwise)
+        done : np.ndarray[bool]
+            whether the round finished at each table
+        """
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.n, dtype=np.int8)
+        done = np.zeros(self.n, dtype=bool)
+
+        hits = self._rows[actions == HIT]
+        if len(hits):
+            add_cards(self.totals[1], self.soft[1], hits, self.shoe.deal(hits))
+            busted = hits[self.totals[1, hits] > 21]
+            rewards[busted] = -1
+            done[busted] = True
+
+        # the dealer finishes the tables where the player stays
+        stays = self._rows[actions != HIT]
+        if len(stays):
+            _play_hands(self.shoe, self.totals[0], self.soft[0], stays, self.dealer_policy, self.upcards)
+            rewards[stays] = calc_winner(self.totals[0, stays], self.totals[1, stays])
+            done[stays] = True
+
+        finished = self._rows[done]
+        self.rounds += len(finished)
+        if len(finished):
+            self._start(finished)
+        return self.observations, rewards, done
+
+
+def policy_actions(table, observations) -> np.ndarray:
+    """
+    Function to look up the actions of a tabular policy for many observations at once
+
+    Parameters
+    ----------
+    table : QTable
+        table holding the policy (e.g. `Agent.table`)
+    observations : np.ndarray
+        (player total, dealer's face up card, ...) for every table
+
+    Returns
+    -------
+    actions : np.ndarray[int8]
+        action code for every table
+    """
+    return table.policy[table.positions(observations[:, 0], observations[:, 1])]
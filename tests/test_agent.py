@@ -11,4 +11,57 @@ def test_agent(n_rounds=5):
         raise e
     
     return
-    
\ No newline at end of file
+    
+
+def test_agent_parallel(n_rounds=400):
+    game = GameWAgents(MCES, nagents=2, nrounds=n_rounds)
+    agent = game.play_parallel(workers=2, sync_every=50, seed=0)
+    visits = sum(count for count, _ in agent.return_func.values())
+    assert n_rounds <= visits  # two agents per table, at least one decision each per round
+    assert dict(game.agents[0].return_func) == dict(agent.return_func)
+    assert agent.episodes == game.agents[0].episodes == 2 * n_rounds
+
+
+def test_agent_parallel_errors():
+    import pytest
+    from blackjack.methods import QLearning
+    from blackjack.parallel import train_parallel
+
+    # only monte carlo returns can be merged
+    with pytest.raises(ValueError):
+        GameWAgents(QLearning, nrounds=10).play_parallel(workers=2)
+
+    # a worker that dies is reported instead of a bare EOFError
+    with pytest.raises(RuntimeError, match="Worker 0"):
+        train_parallel(MCES, nrounds=10, workers=1, not_a_deck_kwarg=True)
+
+
+def test_agent_checkpoint(tmp_path):
+    import json
+
+    game = GameWAgents(MCES, nrounds=20)
+    game.play()
+    agent = game.agents[0]
+    agent.save(tmp_path, export_json=True)
+
+    loaded = GameWAgents(MCES).agents[0]
+    loaded.load(tmp_path, mmap=True)
+    assert loaded.episodes == agent.episodes == 20
+    assert dict(loaded.return_func) == dict(agent.return_func)
+    assert dict(loaded.policy_func) == dict(agent.policy_func)
+
+    with open(tmp_path / 'policy.json') as fp:
+        assert json.load(fp)['4,2'] == agent.policy_func[4, 2]
+
+    # checkpoints of a table with other axes (same shape) are refused, the episodes are optional
+    import pytest
+    from blackjack.checkpoint import save_table
+    from blackjack.methods import QTable
+
+    shifted = QTable(range(5, 23), agent.dealer_values, agent.actions)
+    save_table(str(tmp_path / 'agent.ckpt'), shifted)
+    with pytest.raises(ValueError):
+        loaded.load(tmp_path)
+    save_table(str(tmp_path / 'agent.ckpt'), agent.table)
+    loaded.load(tmp_path)
+    assert loaded.episodes == 0
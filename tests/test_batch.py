@@ -0,0 +1,33 @@
+import random
+
+import numpy as np
+
+from blackjack.batch import play_rounds
+from blackjack.players import Dealer, Player
+from blackjack.round import calc_winner, start_round, play_round, cleanup_round
+
+
+def test_batch_rounds():
+    scores, busted, results = play_rounds(1000, nplayers=3, repeats=2, seed=0, chunk_size=300)
+
+    assert scores.shape == (1000, 4) and results.shape == (1000, 3)
+    assert (busted == (scores > 21)).all()
+    # the dealer stands on 17 and never stays below it
+    assert (scores[:, 0] >= 17).all()
+    assert all(results[i, j] == calc_winner(scores[i, 0], scores[i, j+1]) for i in range(100) for j in range(3))
+
+
+def test_batch_matches_game(n_rounds=3000):
+    random.seed(0)
+    dealer, players = Dealer(repeats=1), [Player()]
+    outcomes = []
+    for _ in range(n_rounds):
+        dealer.reset_deck()
+        start_round(dealer, players)
+        play_round(dealer, players)
+        (dealer_score, player_score), _ = cleanup_round(dealer, players)
+        outcomes.append(calc_winner(dealer_score, player_score))
+
+    _, _, results = play_rounds(50_000, seed=0)
+    assert abs(np.mean(outcomes) - results.mean()) < 0.05
+    assert abs(np.mean(np.array(outcomes) == 1) - (results == 1).mean()) < 0.03
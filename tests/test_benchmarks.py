@@ -0,0 +1,20 @@
+import copy
+
+from blackjack.benchmarks import compare, run_benchmarks
+
+
+def test_benchmarks():
+    results = run_benchmarks(number=50, rounds=20, decks=(1, 6), seats=(1, 2))
+    assert set(results['macro']) == {f"{kind}_{d}decks_{s}seats" for kind in ('game', 'agents') for d in (1, 6)
+                                     for s in (1, 2)}
+    assert compare(results, results) == []
+    result = results['macro']['agents_1decks_2seats']
+    assert result['episodes_rate'] == 2 * result['rate']
+    assert 'episodes_rate' not in results['macro']['game_1decks_2seats']
+
+    baseline = copy.deepcopy(results)
+    baseline['micro']['hand_total'] *= 2
+    baseline['macro']['game_1decks_1seats']['peak_kb'] /= 2
+    baseline['macro']['agents_6decks_2seats']['episodes_rate'] *= 2
+    regressions = compare(results, baseline)
+    assert len(regressions) == 3 and 'episodes/s' in regressions[-1]
@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+from blackjack.cli import main
+
+
+def test_cli_imports_lazily():
+    code = "import sys, blackjack.cli; blackjack.cli.make_parser(); print('numpy' in sys.modules)"
+    assert subprocess.check_output([sys.executable, '-c', code]).strip() == b'False'
+
+
+def test_cli_train_evaluate(tmp_path, capsys):
+    out = str(tmp_path / 'run')
+    assert main(['train', '--rounds', '300', '--checkpoint-every', '100', '--out', out, '--seed', '0']) == 0
+    assert os.path.exists(os.path.join(out, 'agent.ckpt'))
+    assert capsys.readouterr().out.count('checkpoint') == 3
+
+    assert main(['evaluate', out, '--hands', '20000', '--ci', '0.001', '--seed', '0']) == 0
+    assert '20,000 hands' in capsys.readouterr().out
+
+
+def test_cli_train_seats(tmp_path, capsys):
+    from blackjack.checkpoint import load_table
+
+    # every seat trains the saved table, with one process or several
+    for workers in ('1', '2'):
+        out = str(tmp_path / workers)
+        assert main(['train', '--rounds', '200', '--seats', '3', '--workers', workers, '--out', out, '--seed', '0']) == 0
+        table, meta = load_table(os.path.join(out, 'agent.ckpt'))
+        assert meta['episodes'] == 600 and table.counts.sum() >= 600
+        assert '600 episodes' in capsys.readouterr().out
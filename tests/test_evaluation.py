@@ -0,0 +1,48 @@
+from blackjack.batch import player_policy
+from blackjack.evaluation import evaluate_policy, policy_mask
+from blackjack.players import Player
+from blackjack.solver import solve
+from blackjack.stats import RunningMoments
+
+
+def test_running_moments():
+    moments = RunningMoments()
+    for value in (1, -1, 0, 1):
+        moments.add(value)
+    batch = RunningMoments()
+    batch.merge(2, 0., 2.)
+    batch.merge(2, .5, .5)
+    assert (moments.count, moments.mean) == (batch.count, batch.mean) == (4, .25)
+    assert abs(moments.variance - batch.variance) < 1e-12
+
+
+def test_evaluate_policy():
+    import numpy as np
+    totals, upcards = np.arange(4, 22).repeat(10), np.tile(np.arange(2, 12), 18)
+    assert (policy_mask(Player())(totals, upcards) == player_policy(totals, upcards)).all()
+
+    default = evaluate_policy(Player(), ci_width=0.02, batch_size=20_000, seed=0)
+    assert default['converged'] and default['ci_high'] - default['ci_low'] <= 0.02
+    assert default['hands'] < 10**6 and default['hands_per_sec'] > 0
+
+    optimal = evaluate_policy(solve()[0], ci_width=0.02, batch_size=20_000, seed=0)
+    assert optimal['ev'] > default['ci_high']
+
+    capped = evaluate_policy(player_policy, ci_width=1e-6, batch_size=1000, max_hands=3000, seed=0)
+    assert capped['hands'] == 3000 and not capped['converged']
+
+
+def test_policy_mask_table():
+    import numpy as np
+    from blackjack.methods import MCExploringStarts
+    from blackjack.players import Agent
+
+    # the array lookup of a table matches the dict lookup of its policy
+    agent = Agent(MCExploringStarts)
+    totals, upcards = np.meshgrid(np.arange(4, 22), np.arange(2, 12))
+    from_table = policy_mask(agent)(totals, upcards)
+    from_dict = policy_mask(dict(agent.policy_func))(totals, upcards)
+    assert (from_table == from_dict).all() and from_table.any()
+
+    i, j = agent.table.positions([3, 4, 21, 40], [2, 11, 12, -1])
+    assert list(i) == [-1, 0, 17, -1] and list(j) == [0, 9, -1, -1]
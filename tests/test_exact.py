@@ -0,0 +1,33 @@
+import numpy as np
+
+from blackjack.batch import play_rounds
+from blackjack.exact import dealer_distribution, outcome_probabilities, shoe_counts
+
+
+def test_dealer_distribution():
+    for upcard in range(2, 12):
+        assert abs(sum(dealer_distribution(upcard)) - 1) < 1e-12
+        assert abs(sum(dealer_distribution(upcard, shoe_counts(1, exclude=[upcard]))) - 1) < 1e-12
+    # counts can be any sequence (lists are turned into tuples before the cache)
+    assert dealer_distribution(6, list(shoe_counts(2))) == dealer_distribution(6, shoe_counts(2))
+
+    # the dealer busts the most showing a 6 and the least showing an ace
+    busts = {upcard: dealer_distribution(upcard)[-1] for upcard in range(2, 12)}
+    assert max(busts, key=busts.get) == 6 and min(busts, key=busts.get) == 11
+    assert abs(busts[6] - 0.4232) < 1e-3
+
+    win, push, loss = outcome_probabilities(17, 10)
+    assert abs(win + push + loss - 1) < 1e-12 and loss > win
+    assert outcome_probabilities(22, 6) == (0., 0., 1.)
+
+
+def test_dealer_distribution_matches_simulation():
+    # the dealer's final total from the batch engine with one deck (players always stay)
+    scores, _, _ = play_rounds(100_000, nplayers=1, player_policy=lambda totals, upcards: totals < 0, seed=0)
+    # the upcard is not returned so compare the distribution averaged over upcards
+    expected = np.zeros(6)
+    for upcard in range(2, 12):
+        p = (16 if upcard == 10 else 4) / 52
+        expected += p * np.array(dealer_distribution(upcard, shoe_counts(1, exclude=[upcard])))
+    observed = [np.mean(scores[:, 0] == total) for total in range(17, 22)] + [np.mean(scores[:, 0] > 21)]
+    assert np.abs(np.array(observed) - expected).max() < 0.01
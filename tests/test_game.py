@@ -11,4 +11,104 @@ def test_game():
     except:
         raise AssertionError("Something went wrong when playing a game")
 
+def test_calc_winner_busts():
+    import numpy as np
+    from blackjack import batch
+    from blackjack.round import calc_winner
+
+    # (dealer, player) -> result, busts decide before the scores are compared
+    cases = {(20, 18): -1, (18, 20): 1, (19, 19): 0, (25, 18): 1, (18, 25): -1, (23, 25): -1, (25, 23): -1}
+    for (dealer, player), result in cases.items():
+        assert calc_winner(dealer, player) == result
+    dealer, player = (np.array(scores) for scores in zip(*cases))
+    assert list(batch.calc_winner(dealer, player)) == list(cases.values())
+
 # trigger build
+
+def test_game_events():
+    from blackjack.events import BufferSink, ROUND
+
+    sink = BufferSink()
+    Game(nplayers=2, nrounds=3, events=sink).play()
+    events = [event for event, _ in sink.drain()]
+    assert events.count('round_start') == 3 and events.count('turn') == 6
+    assert 'decision' in events and not sink.buffer
+
+    sink = BufferSink(level=ROUND)
+    Game(nrounds=2, events=sink).play()
+    assert [event for event, _ in sink.buffer] == ['round_start', 'scores'] * 2
+
+def test_game_stats():
+    gm = Game(nplayers=2, nrounds=10, events=None)
+    assert gm.stats is None
+
+    gm.instrument()
+    gm.play()
+    stats = gm.stats
+    assert stats['reshuffles'] == 10 and stats['cards_dealt'] >= 10 * 6
+    assert stats['phases']['play_round']['calls'] == 10
+    assert stats['phases']['single_hand_one_player']['calls'] == 20
+    assert stats['phases']['start_round']['calls'] == 10  # both cards are dealt in one pass
+
+def test_game_outcomes():
+    from blackjack.events import NULL_SINK
+
+    snapshots = []
+    gm = Game(nplayers=2, nrounds=500, events=NULL_SINK)
+    gm.track(window=50, every=100, callback=snapshots.append)
+    gm.play()
+
+    assert [snapshot['rounds'] for snapshot in snapshots] == [100, 200, 300, 400, 500]
+    for outcomes in gm.snapshot()['players']:
+        assert outcomes['wins'] + outcomes['pushes'] + outcomes['losses'] == 500
+        assert abs(outcomes['mean_return'] - (outcomes['wins'] - outcomes['losses']) / 500) < 1e-9
+        window = outcomes['window_win_rate'] + outcomes['window_push_rate'] + outcomes['window_loss_rate']
+        assert abs(window - 1) < 1e-9
+    assert len(gm.outcomes[0]._recent) == 50
+
+def test_table_observation():
+    from blackjack.events import NULL_SINK
+    from blackjack.players import Player
+
+    class Watcher(Player):
+        def policy(self, dealers_value, observation=None):
+            seen.append((len(observation.cards), observation.seen, sum(observation.remaining())))
+            assert observation.cards[-1] is not None and sum(observation.value_counts) == observation.seen
+            return super().policy(dealers_value, observation)
+
+    seen = []
+    gm = Game(nplayers=2, nrounds=50, events=NULL_SINK, penetration=.75)
+    gm.players[0] = Watcher()
+    gm.play()
+
+    assert min(cards for cards, _, _ in seen) == 5  # hole card stays hidden
+    observation = gm.dealer.observation
+    assert observation.cards == []  # cleared at the end of every round
+    for cards, count, remaining in seen:
+        # both seats and the dealer's face up card (the hole card stays hidden), plus the first seats hits
+        assert 5 <= cards <= count and remaining == 52 - count
+
+def test_round_kernel():
+    from blackjack.players import Dealer, Player
+    from blackjack.profiling import PhaseStats
+    from blackjack.round import RoundKernel, calc_winner
+
+    class Hitter(Player):
+        def policy(self, dealers_value, observation=None):
+            return 'stay' if self.bust else 'hit'
+
+    dealer, players = Dealer(), [Hitter(), Hitter()]
+    dealer.stats = PhaseStats()
+    kernel = RoundKernel(dealer, players)
+    scores, busted, results = kernel.run()
+    # every seat busts so the dealer does not play
+    assert busted[1:] == [True, True] and results == [-1, -1]
+    assert 'dealer_play' not in dealer.stats.snapshot()['phases'] and not busted[0]
+    dealer.stats = None
+
+    # same lists every round and the same results as calc_winner
+    kernel.players[:] = [Player(), Player()]
+    for _ in range(200):
+        again = kernel.run()
+        assert again[0] is scores
+        assert results == [calc_winner(scores[0], score) for score in scores[1:]]
@@ -0,0 +1,99 @@
+import numpy as np
+
+from blackjack.methods import MCExploringStarts as MCES
+from blackjack.methods.tables import QTable
+from blackjack.players import Agent
+
+
+def test_policy_improvement():
+    method = MCES(init_val=0)
+    actions = Agent.actions
+
+    # greedy wrt the values, not the keys
+    q_func = {(10, 5, 'hit'): 1.0, (10, 5, 'stay'): -1.0}
+    policy = method.policy_improvement((10, 5, 'stay'), actions, {}, q_func)
+    assert policy == {(10, 5): 'hit'}
+
+    table = method._init_table(Agent.player_values, Agent.dealer_values, actions)
+    table.q_func[10, 5, 'stay'] = 2.0
+    method.policy_improvement((10, 5), actions, table.policy_func, table.q_func)
+    assert table.policy_func[10, 5] == 'stay'
+    assert len(table.policy_func) == 18 * 10 and len(table.return_func) == 18 * 10 * 2
+
+
+def test_table_merge():
+    table = QTable([4, 5], [2], {'stay': 0, 'hit': 1})
+    table.evaluate(0, 0, 1, 1.0)
+    table.evaluate(0, 0, 1, 0.0)
+    assert table.return_func[4, 2, 'hit'] == (2, 0.5)
+
+    counts, sums = np.zeros_like(table.counts), np.zeros_like(table.q)
+    counts[0, 0, 1], sums[0, 0, 1] = 2, -3.0
+    table.merge(counts, sums)
+    assert table.return_func[4, 2, 'hit'] == (4, -0.5)
+    assert table.return_func[5, 2, 'hit'] == (0, 0.0)
+
+
+def test_trajectory():
+    from blackjack.trajectory import Trajectory
+
+    trajectory = Trajectory((18, 10, 2))
+    for step in [(3, 1, 1), (8, 1, 1), (3, 1, 1), (3, 1, 0)]:
+        trajectory.append(*step)
+    assert [step[:3] for step in trajectory.backward(-1)] == [(3, 1, 0), (8, 1, 1), (3, 1, 1)]
+    assert [step[3] for step in trajectory.backward(1, discount=.5)] == [1, .25, .125]
+
+    trajectory.first_visit = False
+    assert len(list(trajectory.backward(1))) == 4
+
+    trajectory.reset()
+    trajectory.append(3, 1, 1)
+    assert len(trajectory) == 1 and list(trajectory.backward(1)) == [(3, 1, 1, 1)]
+
+
+def test_td_batch_update():
+    from blackjack.methods import QLearning, SARSA
+
+    for method, expected in ((QLearning(alpha=.5), .5 * 2.), (SARSA(alpha=.5), .5 * -1.)):
+        table = method._init_table([4, 5], [2], {'stay': 0, 'hit': 1})
+        table.q[1, 0] = [-1., 2.]
+        # (4, 2, hit) -> (5, 2, stay) and the round ends after (5, 2, stay) with a win
+        method.batch_update(table, ([0, 1], [0, 0], [1, 0]), [0., 1.], ([1, 0], [0, 0], [0, 0]), [False, True])
+        assert table.q[0, 0, 1] == expected
+        assert table.q[1, 0, 0] == -1. + .5 * (1. - -1.)
+        assert table.counts.sum() == 2 and table.policy[1, 0] == 1
+
+
+def test_td_agent():
+    from blackjack import GameWAgents
+    from blackjack.events import NULL_SINK
+    from blackjack.methods import QLearning
+    from blackjack.solver import solve, policy_error
+
+    game = GameWAgents(QLearning, nrounds=20000, events=NULL_SINK)
+    game.play()
+    agent = game.agents[0]
+    assert agent.episodes == 20000
+    assert policy_error(agent.policy_func, solve()[0]) < .3
+
+
+def test_table_convergence():
+    table = QTable([4, 5], [2], {'stay': 0, 'hit': 1})
+    table.evaluate(0, 0, 1, 1.0)
+    table.evaluate(0, 0, 1, 0.0)
+    table.improve(0, 0)
+    table.improve(1, 0)
+    window = table.convergence()
+    assert window == {'updates': 2, 'policy_changes': 1, 'max_q_change': 1.0, 'mean_q_change': .75, 'coverage': .25}
+    assert table.convergence()['updates'] == 0
+
+
+def test_early_stopping():
+    from blackjack import GameWAgents
+    from blackjack.stats import ConvergenceMonitor
+
+    monitor = ConvergenceMonitor(window=2000, max_policy_changes=5, patience=2)
+    game = GameWAgents(MCES, nrounds=10**6, monitor=monitor)
+    game.play()
+    assert game.converged_at is not None and game.rounds_played == game.converged_at < 10**6
+    assert monitor.streak == 2 and monitor.last['policy_changes'] <= 5
@@ -0,0 +1,55 @@
+import numpy as np
+
+from blackjack import GameWAgents
+from blackjack.events import NULL_SINK
+from blackjack.methods import MCExploringStarts as MCES
+from blackjack.recording import TrajectoryRecorder, read_batches
+
+
+def test_recording(tmp_path):
+    path = str(tmp_path / 'episodes.log')
+    game = GameWAgents(MCES, nrounds=300, events=NULL_SINK)
+    agent = game.agents[0]
+    with TrajectoryRecorder(path, chunk_size=100) as recorder:
+        agent.recorder = recorder
+        game.play()
+    agent.recorder = None
+
+    batches = list(read_batches(path))
+    assert len(batches) > 1
+    episode = np.concatenate([batch['episode'] for batch in batches])
+    player = np.concatenate([batch['player'] for batch in batches])
+    reward = np.concatenate([batch['reward'] for batch in batches])
+
+    assert episode[-1] == 299 and (np.diff(episode) >= 0).all()
+    assert player.min() >= 4 and player.max() <= 21
+    assert set(np.unique(reward)) <= {-1, 0, 1}
+    assert len(np.unique(episode)) == 300  # at least one decision per round
+
+    # appending keeps the earlier episodes
+    with TrajectoryRecorder(path) as recorder:
+        recorder.step(12, 10, 'hit')
+        recorder.end_episode(-1)
+    last = list(read_batches(path))[-1]
+    assert last['episode'][-1] == 300 and last['action'][-1] == 1 and last['reward'][-1] == -1
+
+
+def test_learn_offline(tmp_path):
+    from blackjack.players import Agent
+
+    path = str(tmp_path / 'episodes.log')
+    game = GameWAgents(MCES, nrounds=2000, events=NULL_SINK)
+    online = game.agents[0]
+    with TrajectoryRecorder(path, chunk_size=1000) as recorder:
+        online.recorder = recorder
+        game.play()
+    online.recorder = None
+
+    # replaying the log gives the same returns as learning while playing
+    offline = Agent(MCES)
+    offline.learn_offline(read_batches(path))
+    assert offline.episodes == 2000
+    assert (offline.table.counts == online.table.counts).all()
+    seen = online.table.counts > 0
+    assert np.allclose(offline.table.q[seen], online.table.q[seen])
+    assert (offline.table.policy == offline.table.q.argmax(axis=2)).all()
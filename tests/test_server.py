@@ -0,0 +1,126 @@
+import asyncio
+import json
+import time
+
+from blackjack.players import Player
+from blackjack.server import TableServer
+
+
+async def client(port, rounds=3, join=None, delay=0.):
+    """ scripted client --- hits below 17 and leaves after a few rounds """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write((json.dumps(join or {'op': 'join', 'agents': 1}) + '\n').encode())
+    results = []
+    while len(results) < rounds:
+        message = json.loads(await reader.readline())
+        if message['event'] == 'decision':
+            await asyncio.sleep(delay)
+            action = 'hit' if message['total'] < 17 else 'stay'
+            writer.write((json.dumps({'op': 'action', 'action': action, 'decision': message['decision']}) + '\n')
+                         .encode())
+        elif message['event'] == 'result':
+            results.append(message)
+        elif message['event'] == 'error':
+            raise AssertionError(message)
+    writer.write(b'{"op": "leave"}\n')
+    writer.close()
+    return results
+
+
+def test_server_sessions():
+    async def main():
+        server = TableServer(action_timeout=5., agent_factory=Player)
+        listener = await server.start()
+        port = listener.sockets[0].getsockname()[1]
+
+        # an idle human only holds up its own table
+        idle_reader, idle_writer = await asyncio.open_connection('127.0.0.1', port)
+        idle_writer.write(b'{"op": "join"}\n')
+        assert json.loads(await idle_reader.readline())['event'] == 'joined'
+
+        start = time.perf_counter()
+        sessions = await asyncio.gather(*(client(port) for _ in range(200)))
+        assert time.perf_counter() - start < 5.
+        for results in sessions:
+            assert len(results) == 3 and all(result['result'] in (-1, 0, 1) for result in results)
+            assert all(len(result['scores']) == 3 for result in results)  # dealer, human and agent
+
+        idle_writer.close()
+        await asyncio.sleep(0.05)
+        assert not server.tables
+        listener.close()
+        await listener.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_server_shared_table():
+    async def main():
+        server = TableServer(agent_factory=Player)
+        listener = await server.start()
+        port = listener.sockets[0].getsockname()[1]
+
+        first = asyncio.ensure_future(client(port, rounds=5, join={'op': 'join'}, delay=0.02))
+        await asyncio.sleep(0.01)
+        (table_id,) = server.tables
+        second = await client(port, rounds=2, join={'op': 'join', 'table': table_id})
+        assert all(len(result['scores']) == 3 for result in second)  # dealer and both humans
+        assert len(await first) == 5
+        listener.close()
+        await listener.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_server_late_action():
+    async def main():
+        server = TableServer(action_timeout=0.2, agent_factory=Player, max_agents=2)
+        listener = await server.start()
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+        async def receive(event):
+            message = json.loads(await reader.readline())
+            assert message['event'] == event, message
+            return message
+
+        # bad join messages get an error instead of dropping the connection
+        for join in ({'op': 'join', 'agents': 'two'}, {'op': 'join', 'table': [1]}, {'op': 'join', 'agents': -1},
+                     {'op': 'join', 'agents': 10**6}, {'op': 'join', 'agents': 3}):
+            writer.write((json.dumps(join) + '\n').encode())
+            await receive('error')
+        writer.write(b'{"op": "join"}\n')
+        await receive('joined')
+
+        # answer the first decision after it timed out (the seat stays)
+        decision = await receive('decision')
+        await asyncio.sleep(0.3)
+        writer.write((json.dumps({'op': 'action', 'action': 'hit', 'decision': decision['decision']}) + '\n').encode())
+        assert (await receive('result'))['round'] == 0
+
+        # the late hit is not used for the next round
+        decision = await receive('decision')
+        assert decision['round'] == 1 and len(decision['cards']) == 2
+        writer.write((json.dumps({'op': 'action', 'action': 'stay', 'decision': decision['decision']}) + '\n').encode())
+        result = await receive('result')
+        assert result['round'] == 1 and result['total'] == decision['total']
+
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_table_seats():
+    import pytest
+    from blackjack.server import AsyncTable, MAX_SEATS
+
+    table = AsyncTable(0)
+    for seat in range(MAX_SEATS):
+        assert table.seat(Player()) == seat
+    assert table.full
+    with pytest.raises(ValueError):
+        table.seat(Player())
+    # agents are capped so the client still gets a seat
+    assert TableServer(max_agents=100).max_agents == MAX_SEATS - 1
@@ -0,0 +1,35 @@
+from blackjack import GameWAgents
+from blackjack.methods import MCExploringStarts as MCES
+from blackjack.solver import policy_error, q_rmse, solve
+
+
+def test_solver_basic_strategy():
+    policy, q_func = solve()
+    assert len(policy) == 18 * 10 and len(q_func) == 18 * 10 * 2
+    # hard totals (basic strategy without doubling or splitting)
+    assert policy[12, 2] == 'hit' and policy[12, 4] == 'stay'
+    assert policy[16, 10] == 'hit' and policy[16, 6] == 'stay'
+    assert policy[11, 6] == 'hit' and all(policy[17, d] == 'stay' for d in range(2, 12))
+    assert q_func[21, 10, 'stay'] > q_func[20, 10, 'stay'] > 0
+
+    policy, _ = solve(soft=True)
+    assert policy[18, 9, True] == 'hit' and policy[18, 8, True] == 'stay' and policy[18, 8, False] == 'stay'
+    assert (11, 5, True) not in policy
+
+
+def test_solver_compare_agent():
+    policy, q_func = solve()
+    agent = GameWAgents(MCES, nrounds=50).agents[0]
+    assert 0 <= policy_error(agent.policy_func, policy) <= 1
+    assert q_rmse(agent.q_func, q_func) > 0
+    assert policy_error(policy, policy) == 0 and q_rmse(q_func, q_func) == 0
+
+
+def test_solver_finite_shoe():
+    from blackjack.exact import outcome_probabilities, shoe_counts
+
+    # staying is valued against a dealer drawing from the shoe without its up card
+    _, q_func = solve(counts=shoe_counts(1))
+    for total, upcard in ((16, 6), (18, 10), (20, 11)):
+        win, _, loss = outcome_probabilities(total, upcard, shoe_counts(1, exclude=[upcard]))
+        assert abs(q_func[total, upcard, 'stay'] - (win - loss)) < 1e-12
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+from blackjack.sweep import expand_grid, read_results, run_sweep
+
+
+def test_sweep_imports():
+    # the library does not pull in the command line
+    code = "import sys, blackjack.sweep; print('blackjack.cli' in sys.modules)"
+    assert subprocess.check_output([sys.executable, '-c', code]).strip() == b'False'
+
+
+def test_sweep_resume(tmp_path):
+    path = str(tmp_path / 'sweep.jsonl')
+    grid = {'init_val': [0, 5], 'repeats': [1, 2], 'seed': [0]}
+    assert len(expand_grid(grid)) == 4
+
+    assert run_sweep(grid, path, rounds=300, workers=2, eval_hands=1000) == (4, 0)
+    rows = list(read_results(path))
+    assert sorted(row['config']['init_val'] for row in rows) == [0, 0, 5, 5]
+    assert all(row['metrics']['rounds'] == 300 and len(row['policy']) == 180 for row in rows)
+
+    # nothing left to run, then only the missing (and the half written) job runs again
+    assert run_sweep(grid, path, rounds=300, workers=2, eval_hands=1000) == (0, 0)
+    lines = open(path).read().splitlines()
+    with open(path, 'w') as fp:
+        fp.write('\n'.join(lines[:2]) + '\n' + lines[2][:20])
+    assert run_sweep(grid, path, rounds=300, workers=2, eval_hands=1000) == (2, 0)
+    assert len(list(read_results(path))) == 4
+
+    # another budget is another job
+    assert run_sweep(grid, path, rounds=200, workers=2, eval_hands=1000) == (4, 0)
+
+
+def test_sweep_failed_job(tmp_path):
+    path = str(tmp_path / 'sweep.jsonl')
+    grid = [{'seed': 0}, {'not_a_kwarg': 1}, {'seed': 1}]
+
+    # the rows of the other jobs are still written and only the failed job runs again
+    assert run_sweep(grid, path, rounds=100, workers=2, eval_hands=0) == (3, 1)
+    rows = list(read_results(path))
+    assert len(rows) == 3 and sum('error' in row for row in rows) == 1
+    assert run_sweep(grid, path, rounds=100, workers=2, eval_hands=0) == (1, 1)
@@ -0,0 +1,59 @@
+import pytest
+
+from blackjack.tools import Card, Deck, Hand, flyweights
+
+
+def test_deck():
+    deck = Deck(repeats=2)
+    assert len(deck) == 104 and len(deck.cards) == 104
+
+    dealt = [deck.deal_card() for _ in range(104)]
+    assert len(deck) == 0
+    assert len(set(dealt)) == 52  # every deck shares the same cards
+    assert all(card is flyweights()[i] for i, card in enumerate(Deck(shuffle=False)))
+    with pytest.raises(IndexError):
+        deck.deal_card()
+
+    with pytest.raises(AttributeError):
+        dealt[0].value = 1
+
+
+def test_hand_aces():
+    ace, nine = Card('Ace', 'Spades', 11), Card('9', 'Spades', 9)
+    assert Hand(ace, ace).total == 12
+    assert Hand(ace, ace, nine).total == 21
+    assert Hand(ace, nine, nine, ace).total == 20
+    assert ace.value == 11
+
+
+def test_hand_reset():
+    hand = Hand()
+    for card in (Card('Ace', 'Spades', 11), Card('6', 'Spades', 6)):
+        hand.add(card)
+    assert hand.total == 17 and hand.is_soft
+
+    hand.add(Card('King', 'Spades', 10))
+    assert hand.total == 17 and not hand.is_soft and not hand.bust
+
+    hand.reset()
+    assert len(hand) == 0 and hand.total == 0
+
+
+def test_shoe_reuse():
+    from blackjack import Game
+    from blackjack.events import NULL_SINK
+
+    deck = Deck(repeats=2, penetration=.5)
+    dealt = [deck.deal_card() for _ in range(60)]
+    assert deck.cut_card_reached
+    deck.reshuffle()
+    assert len(deck) == 104 and sorted(map(repr, deck)) == sorted(map(repr, Deck(repeats=2)))
+
+    for shuffle_batch in (0, 8):
+        gm = Game(nplayers=3, nrounds=100, events=NULL_SINK, repeats=6, penetration=.75, shuffle_batch=shuffle_batch)
+        deck = gm.dealer.deck
+        gm.instrument()
+        gm.play()
+        assert gm.dealer.deck is deck
+        # about 20 cards a round leaves room for ~ 11 rounds per shoe
+        assert 1 < gm.stats['reshuffles'] < 20
@@ -0,0 +1,55 @@
+import numpy as np
+
+from blackjack.batch import play_rounds, player_policy
+from blackjack.vector_env import VectorEnv, policy_actions
+
+
+def test_vector_env():
+    env = VectorEnv(1000, seed=0)
+    observations = env.reset()
+    assert observations.shape == (1000, 3)
+
+    rewards = []
+    for _ in range(300):
+        actions = player_policy(observations[:, 0], observations[:, 1]).astype(np.int8)
+        observations, reward, done = env.step(actions)
+        assert (observations[:, 0] >= 4).all() and (observations[:, 0] <= 21).all()
+        assert (reward[~done] == 0).all()
+        rewards.append(reward[done])
+    rewards = np.concatenate(rewards)
+    assert len(rewards) == env.rounds
+
+    # same default policy as the batch engine
+    _, _, results = play_rounds(len(rewards), seed=1)
+    assert abs(rewards.mean() - results.mean()) < 0.03
+    assert env.shoe.shoes.shape == (1000, 52)
+
+
+def test_policy_actions():
+    from blackjack.methods import QTable
+
+    table = QTable(range(4, 22), range(2, 12), {'stay': 0, 'hit': 1})
+    table.policy[table.index(12, 10)] = 1
+    actions = policy_actions(table, np.array([[12, 10, 0], [13, 10, 0]], dtype=np.int8))
+    assert list(actions) == [1, 0]
+
+
+def test_td_batch_update_vector_env():
+    from blackjack.methods import QLearning
+    from blackjack.players import Agent
+
+    # thousands of tables share a few hundred state-actions, so every batch has many duplicates
+    method = QLearning(alpha=.05)
+    table = method._init_table(Agent.player_values, Agent.dealer_values, Agent.actions)
+    env = VectorEnv(10000, seed=0)
+    rng = np.random.default_rng(0)
+    observations = env.reset()
+    for _ in range(30):
+        actions = np.where(rng.random(env.n) < .1, rng.integers(0, 2, env.n), policy_actions(table, observations))
+        index = (observations[:, 0] - 4, observations[:, 1] - 2, actions)
+        observations, rewards, done = env.step(actions)
+        next_index = (observations[:, 0] - 4, observations[:, 1] - 2, policy_actions(table, observations))
+        method.batch_update(table, index, rewards, next_index, done)
+
+    # rewards are in [-1, 1] so the q function has to stay there
+    assert np.abs(table.q).max() <= 1. and table.counts.sum() == 30 * env.n